@@ -0,0 +1,91 @@
+"""Microbenchmark of ModelFactory.create_printjobs.
+
+Compares the compiled ModelDecoder path with the previous approach of
+converting every key with camel_to_underscore and building each model with
+safe_tuple_populate. Run with python benchmarks/bench_decode.py [records].
+"""
+import sys
+import timeit
+
+from printnodeapi.model import (
+    Capabilities,
+    Computer,
+    ModelFactory,
+    Printer,
+    PrintJob,
+    safe_tuple_populate)
+from printnodeapi.util import camel_to_underscore
+
+
+def make_printjobs(count, printers=5):
+    computer = {
+        'id': 11, 'name': 'COMPUTER', 'inet': '10.0.0.1', 'inet6': None,
+        'hostname': 'host', 'version': '4.7.1', 'jre': None,
+        'createTimestamp': '2015-07-10T15:04:40.253Z', 'state': 'connected'}
+    return [{
+        'id': n,
+        'printer': {
+            'id': n % printers, 'computer': dict(computer),
+            'name': 'PRINTER', 'description': 'description',
+            'capabilities': {
+                'bins': ['Tray 1'], 'collate': True, 'copies': 99,
+                'color': True, 'dpis': ['600x600'], 'duplex': True,
+                'extent': [[100, 100], [2000, 2000]], 'medias': [],
+                'nup': [], 'papers': {'A4': [2100, 2970]},
+                'printrate': None, 'supportsCustomPaperSize': False},
+            'default': False,
+            'createTimestamp': '2015-07-10T15:04:40.253Z',
+            'state': 'online'},
+        'title': 'label {}'.format(n), 'contentType': 'pdf_uri',
+        'source': 'PythonApiClient', 'expireAt': None,
+        'createTimestamp': '2015-07-10T15:04:40.253Z', 'state': 'done'}
+        for n in range(count)]
+
+
+def legacy_create_printjob(printjob_dict):
+    # the per-record decoding used before ModelDecoder
+    def underscore_keys(d):
+        return {camel_to_underscore(k): v for k, v in d.items()}
+
+    fields = underscore_keys(printjob_dict)
+    printer = underscore_keys(fields['printer'])
+    computer = underscore_keys(printer['computer'])
+    del computer['jre']
+    computer['inet6'] = computer.pop('inet_6')
+    printer['computer'] = safe_tuple_populate(Computer, computer)
+    printer['capabilities'] = safe_tuple_populate(
+        Capabilities,
+        underscore_keys(printer['capabilities']))
+    fields['printer'] = safe_tuple_populate(Printer, printer)
+    fields.setdefault('content', None)
+    fields.setdefault('pages', None)
+    fields.setdefault('qty', 1)
+    fields.setdefault('options', {})
+    return safe_tuple_populate(PrintJob, fields)
+
+
+def best_of(f, repeat=5):
+    return min(timeit.repeat(f, number=1, repeat=repeat))
+
+
+def main(count=10000):
+    printjobs = make_printjobs(count)
+    factory = ModelFactory()
+    assert [legacy_create_printjob(pj) for pj in printjobs[:10]] == \
+        factory.create_printjobs(printjobs[:10])
+
+    legacy = best_of(lambda: [legacy_create_printjob(pj) for pj in printjobs])
+    # create_printjob without a memo builds every nested model
+    compiled = best_of(
+        lambda: [factory.create_printjob(pj) for pj in printjobs])
+    interned = best_of(lambda: factory.create_printjobs(printjobs))
+    print('create_printjobs, {} records'.format(count))
+    print('  legacy:             {:8.1f} ms'.format(legacy * 1000))
+    print('  compiled:           {:8.1f} ms  {:5.1f}x'.format(
+        compiled * 1000, legacy / compiled))
+    print('  compiled, interned: {:8.1f} ms  {:5.1f}x'.format(
+        interned * 1000, legacy / interned))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
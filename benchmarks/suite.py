@@ -0,0 +1,382 @@
+"""Benchmark suite for the client's hot paths.
+
+Times importing the package, model decoding, camel_to_underscore, printjob
+payload encoding, the JSON codecs and end-to-end submissions and listings
+against a local FakeServer, and writes the results as JSON so that runs of
+different releases can be compared:
+
+    PYTHONPATH=. python benchmarks/suite.py --output before.json
+    PYTHONPATH=. python benchmarks/suite.py --compare before.json
+
+--compare exits with status 1 when a benchmark's median got slower than
+--threshold (10% by default). --quick skips the largest inputs and --filter
+runs the benchmarks whose name contains the given text.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from bench_decode import make_printjobs
+
+from printnodeapi.computers import Computers
+from printnodeapi.fakeserver import FakeServer
+from printnodeapi.gateway import Gateway
+from printnodeapi.jsoncodec import JsonCodec, OrjsonCodec
+from printnodeapi.model import ModelFactory
+from printnodeapi.transport import (
+    HttpxTransport,
+    RequestsTransport,
+    Urllib3Transport)
+from printnodeapi.upload import JsonBody
+from printnodeapi.util import camel_to_underscore
+
+_perf_counter = getattr(time, 'perf_counter', time.time)
+
+BENCHMARKS = []
+
+
+def benchmark(name, ops=1, number=1, repeat=5, quick=True):
+    """
+    Registers a benchmark. The decorated function does any setup and
+    returns the callable to time, which performs ops operations (records,
+    bytes, requests...) per call and is called number times per sample.
+    Benchmarks with quick=False are skipped by --quick.
+    """
+
+    def register(setup):
+        BENCHMARKS.append({
+            'name': name,
+            'setup': setup,
+            'ops': ops,
+            'number': number,
+            'repeat': repeat,
+            'quick': quick})
+        return setup
+    return register
+
+
+def measure(run, number, repeat):
+    run()  # warm up caches and connections
+    samples = []
+    for _ in range(repeat):
+        start = _perf_counter()
+        for _ in range(number):
+            run()
+        samples.append((_perf_counter() - start) / number)
+    return samples
+
+
+# import time, each in a fresh interpreter; import.python is the baseline
+# cost of starting one
+
+def _import_benchmark(name, statement):
+    @benchmark('import.' + name, repeat=10)
+    def setup():
+        command = [sys.executable, '-c', statement]
+        return lambda: subprocess.check_call(command)
+
+
+_import_benchmark('python', 'pass')
+_import_benchmark('printnodeapi', 'import printnodeapi')
+_import_benchmark('printnodeapi.Gateway', 'from printnodeapi import Gateway')
+
+
+# model decoding
+
+def _decode_benchmark(count, quick=True):
+    @benchmark(
+        'decode.create_printjobs.{}'.format(count),
+        ops=count,
+        repeat=3 if count >= 100000 else 5,
+        quick=quick)
+    def setup():
+        printjobs = make_printjobs(count)
+        factory = ModelFactory()
+        return lambda: factory.create_printjobs(printjobs)
+
+
+_decode_benchmark(1000)
+_decode_benchmark(10000)
+_decode_benchmark(100000, quick=False)
+
+_API_KEYS = [
+    'id', 'createTimestamp', 'contentType', 'expireAt', 'printJobId',
+    'clientVersion', 'canCreateSubAccounts', 'supportsCustomPaperSize',
+    'releaseTimestamp', 'inet6']
+
+
+@benchmark('util.camel_to_underscore', ops=len(_API_KEYS) * 1000)
+def camel_to_underscore_setup():
+    keys = _API_KEYS * 1000
+    return lambda: [camel_to_underscore(k) for k in keys]
+
+
+# payload encoding, as done by submit_printjob before the request is sent
+
+_KB = 1024
+_MB = 1024 * _KB
+
+
+def _encode_benchmarks(size, quick=True):
+    suffix = '{}kb'.format(size // _KB) if size < _MB else \
+        '{}mb'.format(size // _MB)
+    document = os.urandom(size)
+
+    @benchmark('encode.binary.' + suffix, ops=size, quick=quick)
+    def binary_setup():
+        computers = Computers(None, ModelFactory())
+
+        def encode():
+            data = computers._create_printjob_data(
+                1, 'pdf', 'PrintJob', None, None, None, None, None,
+                document)
+            return json.dumps(data)
+        return encode
+
+    @benchmark('encode.stream.' + suffix, ops=size, quick=quick)
+    def stream_setup():
+        computers = Computers(None, ModelFactory())
+
+        def encode():
+            data = computers._create_printjob_data(
+                1, 'pdf', 'PrintJob', None, None, None, None, None, None,
+                file=io.BytesIO(document))
+            for chunk in JsonBody(data):
+                pass
+        return encode
+
+
+_encode_benchmarks(_KB)
+_encode_benchmarks(_MB)
+_encode_benchmarks(10 * _MB, quick=False)
+
+
+# request and response bodies, with every JSON codec installed
+
+def _codecs():
+    yield JsonCodec()
+    try:
+        yield OrjsonCodec()
+    except ImportError:
+        pass
+
+
+def _codec_benchmarks(codec):
+    prefix = 'codec.' + codec.name
+
+    @benchmark(prefix + '.dumps.printjob_10mb', ops=10 * _MB)
+    def dumps_setup():
+        data = Computers(None, ModelFactory())._create_printjob_data(
+            1, 'pdf', 'PrintJob', None, None, None, None, None,
+            os.urandom(10 * _MB))
+        return lambda: codec.dumps(data)
+
+    @benchmark(prefix + '.loads.printjobs_10000', ops=10000)
+    def loads_setup():
+        body = JsonCodec().dumps(make_printjobs(10000))
+        return lambda: codec.loads(body)
+
+
+for _codec in _codecs():
+    _codec_benchmarks(_codec)
+
+
+# end to end, against a local FakeServer
+
+class _Server:
+    # the FakeServers shared by the end-to-end benchmarks, one per latency
+
+    servers = {}
+
+    @classmethod
+    def gateway(cls, latency=0, **kwargs):
+        server = cls.servers.get(latency)
+        if server is None:
+            server = FakeServer(
+                default_limit=100,
+                seed=0,
+                latency=latency).start()
+            server.populate(
+                computers=20,
+                printers_per_computer=5,
+                printjobs=10000)
+            cls.servers[latency] = server
+        return Gateway(url=server.url, apikey='bench', **kwargs)
+
+    @classmethod
+    def stop(cls):
+        for server in cls.servers.values():
+            server.stop()
+        cls.servers.clear()
+
+
+# seconds the server waits before answering in the concurrency benchmarks,
+# without it requests to a local server are bound by the GIL rather than
+# the round trip that concurrent submissions overlap
+_LATENCY = 0.01
+
+
+@benchmark('e2e.submit_printjob', ops=100, repeat=3)
+def submit_setup():
+    gateway = _Server.gateway(resolution_cache=True)
+
+    def submit():
+        for _ in range(100):
+            gateway._computers.submit_printjob(printer=1, uri='a.pdf')
+    return submit
+
+
+@benchmark('e2e.submit_printjobs.sequential', ops=100, repeat=3)
+def submit_sequential_setup():
+    gateway = _Server.gateway(latency=_LATENCY, resolution_cache=True)
+
+    def submit():
+        for _ in range(100):
+            gateway._computers.submit_printjob(printer=1, uri='a.pdf')
+    return submit
+
+
+@benchmark('e2e.submit_printjobs.8_workers', ops=100, repeat=3)
+def submit_many_setup():
+    gateway = _Server.gateway(latency=_LATENCY, pool_maxsize=8)
+    jobs = [{'printer': 1, 'uri': 'a.pdf'}] * 100
+
+    def submit():
+        for result in gateway.submit_printjobs(jobs, max_workers=8):
+            if result.error is not None:
+                raise result.error
+    return submit
+
+
+@benchmark('e2e.list_printjobs.page_100', ops=100 * 20, repeat=3)
+def list_setup():
+    gateway = _Server.gateway()
+
+    def list_pages():
+        for _ in range(20):
+            gateway.printjobs(limit=100)
+    return list_pages
+
+
+@benchmark('e2e.iter_printjobs.10000', ops=10000, repeat=3)
+def iter_setup():
+    gateway = _Server.gateway()
+
+    def iterate():
+        for _ in gateway.iter_printjobs(page_size=500):
+            pass
+    return iterate
+
+
+def _transport_benchmark(name, create):
+    @benchmark('e2e.get_printer.' + name, ops=200, repeat=3)
+    def setup():
+        gateway = _Server.gateway(transport=create())
+
+        def get():
+            for _ in range(200):
+                gateway.printers(printer=1)
+        return get
+
+
+_transport_benchmark('requests', RequestsTransport)
+_transport_benchmark('urllib3', Urllib3Transport)
+_transport_benchmark('httpx', lambda: HttpxTransport(http2=False))
+
+
+def run(names=None, quick=False, log=sys.stderr):
+    results = {}
+    try:
+        for bench in BENCHMARKS:
+            if names and not any(n in bench['name'] for n in names):
+                continue
+            if quick and not bench['quick']:
+                continue
+            samples = measure(
+                bench['setup'](),
+                bench['number'],
+                bench['repeat'])
+            median = statistics.median(samples)
+            results[bench['name']] = {
+                'unit': 'seconds',
+                'ops': bench['ops'],
+                'repeat': bench['repeat'],
+                'min': min(samples),
+                'median': median,
+                'mean': statistics.mean(samples),
+                'stdev': statistics.stdev(samples) if len(samples) > 1 else 0,
+                'ops_per_second': bench['ops'] / median}
+            log.write('{:40} {:10.3f} ms  {:14,.0f} ops/s\n'.format(
+                bench['name'],
+                median * 1000,
+                bench['ops'] / median))
+    finally:
+        _Server.stop()
+    return results
+
+
+def metadata():
+    try:
+        from importlib.metadata import version as distribution_version
+        version = distribution_version('PrintNodeApi')
+    except Exception:
+        # not installed, or a python without importlib.metadata
+        version = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'printnodeapi': version}
+
+
+def compare(baseline, results, threshold, log=sys.stderr):
+    """logs the change of every benchmark, returns the names that slowed"""
+    slower = []
+    for name, result in sorted(results.items()):
+        before = baseline['benchmarks'].get(name)
+        if before is None:
+            continue
+        change = result['median'] / before['median'] - 1
+        flag = ''
+        if change > threshold:
+            slower.append(name)
+            flag = '  SLOWER'
+        log.write('{:40} {:+8.1%}{}\n'.format(name, change, flag))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--compare', help='results file to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    parser.add_argument('--filter', action='append')
+    parser.add_argument('--quick', action='store_true')
+    args = parser.parse_args(argv)
+
+    report = {
+        'meta': metadata(),
+        'benchmarks': run(args.filter, args.quick)}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, report['benchmarks'], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
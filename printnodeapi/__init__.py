@@ -1,5 +1,6 @@
-from .gateway import Gateway
-from .auth import (
+import sys
+
+from .errors import (
     ApiError,
     ClientError,
     Unauthorized,
@@ -11,3 +12,27 @@ from .auth import (
     ConnectionError,
     HttpError,
     RequestError)
+
+# imported on first use, so that importing the package for its exceptions
+# or a submodule doesn't load the whole client and its dependencies
+_LAZY = {
+    'Gateway': '.gateway',
+    'AsyncGateway': '.aio'}
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        module = _LAZY.get(name)
+        if module is None:
+            raise AttributeError(
+                'module {!r} has no attribute {!r}'.format(__name__, name))
+        import importlib
+        value = getattr(importlib.import_module(module, __name__), name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_LAZY))
+else:
+    from .gateway import Gateway
+    if sys.version_info >= (3, 5):
+        from .aio import AsyncGateway
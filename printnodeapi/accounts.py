@@ -1,5 +1,4 @@
 from printnodeapi.model import Model, Client, Account
-import json
 
 
 class Accounts:
@@ -0,0 +1,447 @@
+import asyncio
+import ssl
+
+from .accounts import Accounts
+from .auth import BaseAuth, _monotonic
+from .errors import (
+    ApiError,
+    ConnectionError,
+    HttpError,
+    NetworkError,
+    RequestError,
+    TimeoutError,
+    TooManyRedirectsError)
+from .computers import BaseComputers, _named
+from .model import ModelFactory
+
+
+def _import_aiohttp():
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError(
+            'AsyncGateway requires aiohttp, '
+            'install it with "pip install PrintNodeApi[async]"')
+    return aiohttp
+
+
+def _reject_unsupported(owner, kwargs, names):
+    # None and False are the defaults, which leave the features off
+    unsupported = [n for n in names if kwargs.get(n) not in (None, False)]
+    if unsupported:
+        raise TypeError('{} does not support {}'.format(
+            owner,
+            ', '.join(unsupported)))
+
+
+class AsyncAuth(BaseAuth):
+    """Auth whose requests are coroutines run on an asyncio event loop.
+
+    Takes the same arguments as Auth except transport, http_cache,
+    coalesce_gets and pool_block, which raise TypeError: requests always go
+    through aiohttp, which waits for a free connection when the pool is
+    full. The aiohttp session is only created on the first request so that
+    it binds to the loop making the calls.
+    """
+
+    UNSUPPORTED = ('transport', 'http_cache', 'coalesce_gets', 'pool_block')
+
+    def __init__(
+            self,
+            url,
+            sslcert=None,
+            pool_connections=10,
+            pool_maxsize=10,
+            keep_alive=True,
+            rate_limiter=None,
+            retry_policy=None,
+            observers=None,
+            json_codec=None,
+            **kwargs):
+        _reject_unsupported('AsyncAuth', kwargs, self.UNSUPPORTED)
+        for name in self.UNSUPPORTED:
+            kwargs.pop(name, None)
+        super(AsyncAuth, self).__init__(
+            url,
+            sslcert,
+            rate_limiter,
+            retry_policy,
+            observers,
+            json_codec,
+            **kwargs)
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._keep_alive = keep_alive
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            aiohttp = _import_aiohttp()
+            connector_args = {}
+            if self._sslcert is not None:
+                connector_args['ssl'] = ssl.create_default_context(
+                    cafile=self._sslcert)
+            connector = aiohttp.TCPConnector(
+                limit=self._pool_connections * self._pool_maxsize,
+                limit_per_host=self._pool_maxsize,
+                force_close=not self._keep_alive,
+                **connector_args)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={'Authorization': self._authorization})
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _request(
+            self,
+            method,
+            endpoint,
+            fields=None,
+            request_headers=None):
+        url, request_headers, data = self._prepare(
+            method,
+            endpoint,
+            fields,
+            request_headers)
+        headers = dict(request_headers)
+        if data is not None:
+            headers.setdefault('Content-Type', 'application/json')
+
+        policy = self._retry_policy
+        retryable = policy is not None and policy.allows(method, headers)
+        limiter = self._rate_limiter
+        timing = {} if self._observers else None
+        if timing is not None:
+            start = _monotonic()
+        throttled = 0
+        retried = 0
+        while True:
+            if limiter is not None:
+                await asyncio.sleep(limiter.reserve())
+            try:
+                response_obj = await self._send(
+                    method,
+                    url,
+                    headers,
+                    data,
+                    timing)
+            except Exception as e:
+                if isinstance(e, (ApiError, NetworkError)):
+                    if self._should_rethrottle(e, throttled):
+                        limiter.throttled(e.retry_after)
+                        throttled += 1
+                        continue
+                    if retryable and policy.should_retry(e, retried + 1):
+                        retried += 1
+                        await asyncio.sleep(policy.delay(retried))
+                        continue
+                    e.retries = throttled + retried
+                if timing is not None:
+                    self._notify(
+                        method, url, data, timing, start,
+                        throttled + retried, type(e))
+                raise
+            if limiter is not None:
+                limiter.succeeded()
+            if timing is not None:
+                self._notify(
+                    method, url, data, timing, start,
+                    throttled + retried, None)
+            return response_obj
+
+    async def _send(self, method, url, headers, data, timing=None):
+        session = self._get_session()
+        if timing is not None:
+            timing.clear()
+            sent = _monotonic()
+        with rewrite_aiohttp_error():
+            async with session.request(
+                    method,
+                    url,
+                    headers=headers,
+                    data=data) as response:
+                if timing is not None:
+                    headers_received = _monotonic()
+                    timing['status_code'] = response.status
+                    timing['ttfb'] = headers_received - sent
+                body = await response.read()
+        if timing is not None:
+            timing['download'] = _monotonic() - headers_received
+            timing['response_bytes'] = len(body)
+
+        self._check_content_type(url, response.headers.get('content-type'))
+        return self._handle_response(
+            response.status,
+            self._json.loads(body),
+            response.headers)
+
+
+class AsyncComputers(BaseComputers):
+    # the urls and models are built by BaseComputers, only the requests
+    # are awaited here
+
+    async def get_computers(
+            self,
+            computer=None,
+            limit=None,
+            after=None,
+            dir=None):
+        params = self._create_pagination_params(limit, after, dir)
+        url = self._computers_url(computer, params)
+        return self._computers_result(computer, await self._auth.get(url))
+
+    async def get_scales(self, computer, dev_name=None, dev_num=None):
+        url = self._scales_url(computer, dev_name, dev_num)
+        return self._factory.create_scales(await self._auth.get(url))
+
+    async def get_states(
+            self,
+            pjob_set=None,
+            limit=None,
+            after=None,
+            dir=None):
+        params = self._create_pagination_params(limit, after, dir)
+        url = self._states_url(pjob_set, params)
+        return self._factory.create_states_map(await self._auth.get(url))
+
+    async def get_printers(
+            self,
+            computer=None,
+            printer=None,
+            limit=None,
+            after=None,
+            dir=None):
+        params = self._create_pagination_params(limit, after, dir)
+        computer_ids = None
+        if self._is_multi_query(printer):
+            computer_ids = await self._get_computer_ids(computer)
+        url = self._printers_url(computer_ids, printer, params)
+        return self._printers_result(printer, await self._auth.get(url))
+
+    async def get_printjobs(
+            self,
+            computer=None,
+            printer=None,
+            printjob=None,
+            limit=None,
+            after=None,
+            dir=None):
+        params = self._create_pagination_params(limit, after, dir)
+        printers = None
+        if self._is_multi_query(printjob) and (
+                computer is not None or printer is not None):
+            printers = await self.get_printers(
+                computer=computer,
+                printer=printer)
+        url = self._printjobs_url(printers, printjob, params)
+        if url is None:
+            return []
+        return self._printjobs_result(printjob, await self._auth.get(url))
+
+    async def submit_printjob(
+            self,
+            computer=None,
+            printer=None,
+            job_type='pdf',
+            title='PrintJob',
+            qty=None,
+            options=None,
+            authentication=None,
+            uri=None,
+            base64=None,
+            binary=None,
+            idempotency_key=None):
+        printers = await self.get_printers(computer=computer, printer=printer)
+        printjob_data = self._create_printjob_data(
+            self._single_printer_id(printers),
+            job_type,
+            title,
+            qty,
+            options,
+            authentication,
+            uri,
+            base64,
+            binary)
+        return await self._send_printjob(printjob_data, idempotency_key)
+
+    async def _get_computer_ids(self, computer):
+        if computer is None or isinstance(computer, str):
+            computers = self._factory.create_computers(
+                await self._auth.get('/computers'))
+            return [c.id for c in _named(computers, computer)]
+        return self._given_computer_ids(computer)
+
+
+class AsyncAccounts(Accounts):
+    # only the calls that post-process their response need overriding, the
+    # rest already return the coroutine created by AsyncAuth
+
+    async def get_clients(self, client_ids=None, os=None):
+        if os:
+            url = "/download/client/"+os
+            clients = self._factory.create_latest_download(
+                await self._auth.get(url))
+        else:
+            client_ids = str(client_ids) if client_ids else ""
+            url = "/download/clients/"+client_ids
+            clients = self._factory.create_clients(await self._auth.get(url))
+
+        return clients
+
+
+class AsyncGateway:
+    """asyncio counterpart of Gateway.
+
+    Every lookup and modification is a coroutine, so many calls can run
+    concurrently on one event loop over a shared connection pool:
+
+        async with AsyncGateway(apikey='api-key') as gateway:
+            account = await gateway.account
+            printers = await gateway.printers()
+
+    Takes the arguments of Gateway, except resolution_cache and those
+    AsyncAuth doesn't support, which raise TypeError.
+    """
+
+    URL = 'https://api.printnode.com'
+
+    def __init__(self, **kwargs):
+        url = kwargs.pop('url', self.URL)
+        _reject_unsupported(
+            'AsyncGateway',
+            kwargs,
+            ('resolution_cache',) + AsyncAuth.UNSUPPORTED)
+        kwargs.pop('resolution_cache', None)
+        intern_models = kwargs.pop('intern_models', False)
+        self._auth = AsyncAuth(url=url, **kwargs)
+        self._factory = ModelFactory(intern_across_responses=intern_models)
+        self._accounts = AsyncAccounts(self._auth, self._factory)
+        self._computers = AsyncComputers(self._auth, self._factory)
+
+    async def close(self):
+        await self._auth.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def account(self):
+        return self._get_account()
+
+    async def _get_account(self):
+        server_account = await self._auth.get('whoami')
+        return self._factory.create_account(server_account)
+
+    @property
+    def computers(self):
+        return self._computers.get_computers
+
+    @property
+    def printers(self):
+        return self._computers.get_printers
+
+    @property
+    def printjobs(self):
+        return self._computers.get_printjobs
+
+    @property
+    def scales(self):
+        return self._computers.get_scales
+
+    @property
+    def tag(self):
+        return self._accounts.get_tag
+
+    @property
+    def api_key(self):
+        return self._accounts.get_api_key
+
+    @property
+    def clientkey(self):
+        return self._accounts.get_clientkey
+
+    @property
+    def clients(self):
+        return self._accounts.get_clients
+
+    @property
+    def states(self):
+        return self._computers.get_states
+
+    async def PrintJob(self, *args, **kwargs):
+        printjob_id = await self._computers.submit_printjob(*args, **kwargs)
+        printjob = await self.printjobs(printjob=printjob_id)
+        return printjob
+
+    async def TestDataGenerate(self):
+        await self._auth.get('test/data/generate')
+
+    async def TestDataDelete(self):
+        await self._auth.delete('test/data/generate')
+
+    async def ModifyTag(self, tagname, tagvalue):
+        tag = await self._accounts.modify_tag(tagname, tagvalue)
+        return tag
+
+    async def DeleteTag(self, tagname):
+        tag = await self._accounts.delete_tag(tagname)
+        return tag
+
+    async def CreateAccount(self, **kwargs):
+        acc_post = await self._accounts.create_account(**kwargs)
+        return acc_post
+
+    async def ModifyAccount(self, **kwargs):
+        acc_id = await self._accounts.modify_account(**kwargs)
+        return self._factory.create_account(acc_id)
+
+    async def DeleteAccount(self, **kwargs):
+        boolean = await self._accounts.delete_account(**kwargs)
+        return boolean
+
+    async def DeleteApiKey(self, api_key):
+        key = await self._accounts.delete_api_key(api_key)
+        return key
+
+    async def CreateApiKey(self, api_key):
+        key = await self._accounts.create_api_key(api_key)
+        return key
+
+    async def ModifyClientDownloads(self, client_id, enabled):
+        clients = await self._accounts.modify_client_downloads(
+            client_id,
+            enabled)
+        return clients
+
+
+class rewrite_aiohttp_error:
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            return
+        aiohttp = _import_aiohttp()
+        mapping = [
+            (asyncio.TimeoutError, TimeoutError),
+            (aiohttp.TooManyRedirects, TooManyRedirectsError),
+            (aiohttp.ClientResponseError, HttpError),
+            (aiohttp.ClientConnectionError, ConnectionError),
+            (aiohttp.ClientError, RequestError)]
+        for aiohttp_exc, exc in mapping:
+            if isinstance(exc_value, aiohttp_exc):
+                raise exc(str(exc_value)) from exc_value
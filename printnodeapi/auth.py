@@ -1,15 +1,63 @@
-import re
+import base64
+import logging
 import os
-import json
-import requests
 import sys
-from future.utils import raise_from
-
-
-class Auth:
-
-    def __init__(self, url, sslcert=None, **kwargs):
+import threading
+import time
+from concurrent.futures import Future
+
+from .errors import (
+    ApiError,
+    ClientError,
+    ConnectionError,
+    HttpError,
+    NetworkError,
+    RequestError,
+    ServerError,
+    TimeoutError,
+    TooManyRedirectsError,
+    TooManyRequests,
+    Unauthorized,
+    rewrite_requests_error)
+from .jsoncodec import default_codec
+from .metrics import RequestEvent, endpoint_template
+from .ratelimit import parse_retry_after
+from .stream import iter_json_array
+from .upload import JsonBody
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+logger = logging.getLogger(__name__)
+
+
+class BaseAuth:
+    """
+    Credentials, headers, observers and response handling shared by Auth
+    and aio.AsyncAuth, which send the requests.
+    """
+
+    def __init__(
+            self,
+            url,
+            sslcert=None,
+            rate_limiter=None,
+            retry_policy=None,
+            observers=None,
+            json_codec=None,
+            **kwargs):
+        # :param rate_limiter     - optional RateLimiter pacing requests and
+        # retrying them when the API answers 429
+        # :param retry_policy     - optional RetryPolicy for failed requests
+        # :param observers        - callables called with a RequestEvent
+        # after every request, eg a metrics.MetricsAggregator
+        # :param json_codec       - codec from printnodeapi.jsoncodec, the
+        # fastest one installed by default
         self._url = url
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy
+        self._observers = tuple(observers or ())
+        self._json = json_codec or default_codec()
+        self._lock = threading.Lock()
         self._sslcert = sslcert
         if sslcert is not None and not os.path.isfile(sslcert):
             raise FileNotFoundError(
@@ -28,6 +76,19 @@ class Auth:
             self._init_from_child_id(**kwargs)
         else:
             raise KeyError('incorrect constructor args combination')
+        credentials = '{}:{}'.format(*self._auth).encode('utf-8')
+        self._authorization = 'Basic ' + base64.b64encode(
+            credentials).decode('ascii')
+
+    def add_observer(self, observer):
+        # observers run on the thread making the request, keep them quick
+        with self._lock:
+            self._observers = self._observers + (observer,)
+
+    def remove_observer(self, observer):
+        with self._lock:
+            self._observers = tuple(
+                o for o in self._observers if o != observer)
 
     def _init_from_credentials(self, email, password):
         self._auth = (email, password)
@@ -54,73 +115,97 @@ class Auth:
         self._headers = {'X-Child-Account-By-Id': child_id}
 
     def get(self, endpoint, request_headers=None):
-        return self._request(requests.get, endpoint, None, request_headers)
+        return self._request('GET', endpoint, None, request_headers)
 
     def post(self, endpoint, fields=None, request_headers=None):
-        return self._request(requests.post, endpoint, fields, request_headers)
+        return self._request('POST', endpoint, fields, request_headers)
 
     def patch(self, endpoint, fields=None, request_headers=None):
-        return self._request(requests.patch, endpoint, fields, request_headers)
+        return self._request('PATCH', endpoint, fields, request_headers)
 
     def delete(self, endpoint, request_headers=None):
-        return self._request(requests.delete, endpoint, None, request_headers)
-
-    def _request(self, method, endpoint, fields=None, request_headers=None):
-        # request handling
-
-        # :param method      - requests.(get/post/patch/delete)
-        # :param endpoint    - https://api.printnode.com/(endpoint)
-        # :param fields      - data fields to be sent with a post or patch
-        # :param request_headers- if a function requires an extra header or has
-        # custom user set headers, add them to _headers
+        return self._request('DELETE', endpoint, None, request_headers)
 
+    def _notify(self, method, url, data, timing, start, retries, exception):
+        if isinstance(data, JsonBody):
+            request_bytes = data.len
+        else:
+            request_bytes = len(data) if data is not None else 0
+        event = RequestEvent(
+            method=method,
+            endpoint=endpoint_template(url),
+            url=url,
+            status_code=timing.get('status_code'),
+            connect=timing.get('connect'),
+            ttfb=timing.get('ttfb'),
+            download=timing.get('download'),
+            elapsed=_monotonic() - start,
+            request_bytes=request_bytes,
+            response_bytes=timing.get('response_bytes'),
+            retries=retries,
+            exception=exception)
+        for observer in self._observers:
+            # the request has been made, e.g. a printjob created, so a
+            # failing observer must not turn it into an error for the caller
+            try:
+                observer(event)
+            except Exception:
+                logger.exception('request observer %r failed', observer)
+
+    def _should_rethrottle(self, exc, throttled):
+        return (
+            isinstance(exc, TooManyRequests) and
+            self._rate_limiter is not None and
+            throttled < self._rate_limiter.max_retries)
+
+    def _prepare(self, method, endpoint, fields, request_headers):
         if not endpoint.startswith('/'):
             endpoint = '/' + endpoint
-        other_args = {}
-        if fields is not None:
-            other_args['data'] = json.dumps(fields)
-        if request_headers is None:
-            request_headers = self._headers
-        else:
-            request_headers.update(self._headers)
-
-        if method == requests.patch:
-            request_headers.update({"Content-Type": "application/json"})
-
-        if self._sslcert is not None:
-            other_args['verify'] = self._sslcert
-        url = self._url + endpoint
-        with rewrite_requests_error():
-            response = method(
-                url=url,
-                auth=self._auth,
-                headers=request_headers,
-                **other_args)
-
-        content_type = response.headers.get('content-type')
+        data = None
+        if isinstance(fields, JsonBody):
+            data = fields
+        elif fields is not None:
+            data = self._json.dumps(fields)
+        # a new dict per request: self._headers is shared by every thread
+        # and the caller's headers are left as they were passed
+        headers = dict(request_headers or {})
+        headers.update(self._headers)
+
+        if method == 'PATCH':
+            headers['Content-Type'] = 'application/json'
+
+        return self._url + endpoint, headers, data
+
+    def _check_content_type(self, url, content_type):
         if content_type != 'application/json':
             template = 'Incorrect Content-Type "{}" for url "{}"'
             raise ValueError(template.format(content_type, url))
-        response_obj = response.json()
+
+    def _handle_response(self, status_code, response_obj, headers=None):
         if sys.version_info[0] < 3:
             response_obj = self._fix_unicode(response_obj)
 
-        if 401 == response.status_code:
-            raise Unauthorized(response.status_code, **response_obj)
-        elif 429 == response.status_code:
-            raise TooManyRequests(response.status_code, **response_obj)
-        elif self._is_hundreth(4, response.status_code):
-            raise ClientError(response.status_code, **response_obj)
-        elif self._is_hundreth(5, response.status_code):
-            raise ServerError(response.status_code, **response_obj)
-        elif self._is_hundreth(2, response.status_code):
+        if 401 == status_code:
+            raise Unauthorized(status_code, **response_obj)
+        elif 429 == status_code:
+            retry_after = None
+            if headers is not None:
+                retry_after = parse_retry_after(headers.get('Retry-After'))
+            raise TooManyRequests(
+                status_code,
+                retry_after=retry_after,
+                **response_obj)
+        elif self._is_hundreth(4, status_code):
+            raise ClientError(status_code, **response_obj)
+        elif self._is_hundreth(5, status_code):
+            raise ServerError(status_code, **response_obj)
+        elif self._is_hundreth(2, status_code):
             return response_obj
         else:
-            raise Exception('status code: ' + str(response.status_code))
+            raise Exception('status code: ' + str(status_code))
 
     def _is_hundreth(self, hundreth, number):
-        pattern = str(hundreth) + '\d{2,}'
-        return bool(re.match(pattern, str(number)))
+        return hundreth * 100 <= number < (hundreth + 1) * 100
 
     def _fix_unicode(self, json_object):
         returnvalue = json_object
@@ -147,71 +232,292 @@ class Auth:
         return returnvalue
 
 
-class ApiError(RuntimeError):
-    def __init__(self, status_code, code, message, uid=None, **remaining):
-        super(ApiError, self).__init__('{}({}): {}'.format(
-            code,
-            status_code,
-            message))
-        self.status_code = status_code
-        self.code = code
-        self.message = message
-        self.uid = uid
-
-
-class ClientError(ApiError):
-    pass
-
-
-class Unauthorized(ClientError):
-    pass
-
-
-class TooManyRequests(ClientError):
-    pass
-
-
-class ServerError(ApiError):
-    pass
-
-
-class NetworkError(RuntimeError):
-    pass
-
-
-class TimeoutError(NetworkError):
-    pass
-
-
-class TooManyRedirectsError(NetworkError):
-    pass
-
-
-class ConnectionError(NetworkError):
-    pass
-
-
-class HttpError(NetworkError):
-    pass
-
-
-class RequestError(NetworkError):
-    pass
-
-
-class rewrite_requests_error:
-
-    mapping = {
-        requests.Timeout: TimeoutError,
-        requests.TooManyRedirects: TooManyRedirectsError,
-        requests.HTTPError: HttpError,
-        requests.ConnectionError: ConnectionError}
+class Auth(BaseAuth):
+
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+            self,
+            url,
+            sslcert=None,
+            pool_connections=10,
+            pool_maxsize=10,
+            pool_block=False,
+            keep_alive=True,
+            rate_limiter=None,
+            retry_policy=None,
+            observers=None,
+            transport=None,
+            http_cache=None,
+            json_codec=None,
+            coalesce_gets=False,
+            **kwargs):
+        # :param pool_connections - number of per-host pools to keep
+        # :param pool_maxsize     - max connections kept open to one host
+        # :param pool_block       - wait for a free connection instead of
+        # opening a throwaway one when a host's pool is exhausted
+        # :param keep_alive       - reuse connections between requests
+        # :param transport        - HTTP backend from printnodeapi.transport,
+        # a RequestsTransport built from the pool arguments by default
+        # :param http_cache       - optional httpcache.HttpCache for GETs
+        # :param coalesce_gets    - identical GETs made concurrently share
+        # one request and its decoded response
+        # the other arguments are those of BaseAuth
+        BaseAuth.__init__(
+            self,
+            url,
+            sslcert,
+            rate_limiter,
+            retry_policy,
+            observers,
+            json_codec,
+            **kwargs)
+        self._http_cache = http_cache
+        self._inflight = {} if coalesce_gets else None
+        # GETs answered by another thread's identical request
+        self.coalesced = 0
+        self._local = threading.local()
+        if transport is None:
+            transport = self._create_transport(
+                pool_connections,
+                pool_maxsize,
+                pool_block,
+                keep_alive)
+        self._transport = transport
+
+    def _create_transport(
+            self,
+            pool_connections,
+            pool_maxsize,
+            pool_block,
+            keep_alive):
+        from .transport import RequestsTransport
+        return RequestsTransport(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keep_alive=keep_alive,
+            verify=self._sslcert)
+
+    def close(self):
+        self._transport.close()
 
     def __enter__(self):
-        pass
+        return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        if exc_type is None:
-            return
-        exc = self.mapping.get(exc_type, RequestError)
-        raise_from(exc(str(exc_value)), exc_value)
+        self.close()
+
+    def get_stream(self, endpoint, request_headers=None):
+        # yields the elements of the JSON array returned by endpoint as they
+        # are read from the connection instead of decoding it as a whole
+        return self._request(
+            'GET',
+            endpoint,
+            None,
+            request_headers,
+            stream=True)
+
+    def _request(
+            self,
+            method,
+            endpoint,
+            fields=None,
+            request_headers=None,
+            stream=False):
+        # request handling
+
+        # :param method      - GET/POST/PATCH/DELETE
+        # :param endpoint    - https://api.printnode.com/(endpoint)
+        # :param fields      - data fields to be sent with a post or patch
+        # :param request_headers- if a function requires an extra header or has
+        # custom user set headers, add them to _headers
+        # :param stream      - return a generator decoding the JSON array
+        # response element by element
+
+        url, request_headers, data = self._prepare(
+            method,
+            endpoint,
+            fields,
+            request_headers)
+        if self._inflight is not None and method == 'GET' and not stream:
+            return self._coalesced_get(url, request_headers)
+        return self._perform(method, url, request_headers, data, stream)
+
+    def _coalesced_get(self, url, request_headers):
+        # the first caller of a url performs the request, callers arriving
+        # while it is in flight wait for its result instead of repeating it
+        key = (url, tuple(sorted(request_headers.items())))
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            response_obj = future.result()
+            self._local.retries = 0
+            return response_obj
+        # BaseException too: a KeyboardInterrupt or SystemExit must not
+        # leave the future unresolved and its waiters blocked for good
+        try:
+            try:
+                response_obj = self._perform('GET', url, request_headers, None)
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        future.set_result(response_obj)
+        return response_obj
+
+    def _perform(self, method, url, request_headers, data, stream=False):
+        policy = self._retry_policy
+        # a body streamed from a file that can't seek can't be resent
+        replayable = getattr(data, 'replayable', True)
+        retryable = replayable and policy is not None and policy.allows(
+            method,
+            request_headers)
+        cache_lookup = None
+        if self._http_cache is not None and method == 'GET' and not stream:
+            cache_lookup = self._http_cache.lookup(
+                url,
+                dict(request_headers or {}, Authorization=self._authorization))
+            if cache_lookup.fresh:
+                self._local.retries = 0
+                return cache_lookup.entry.data
+            request_headers = self._http_cache.conditional_headers(
+                cache_lookup,
+                request_headers)
+        limiter = self._rate_limiter
+        # timings are only taken while someone observes them
+        timing = {} if self._observers else None
+        if timing is not None:
+            start = _monotonic()
+        throttled = 0
+        retried = 0
+        while True:
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                response_obj = self._send(
+                    method,
+                    url,
+                    request_headers,
+                    data,
+                    stream,
+                    timing,
+                    cache_lookup)
+            except Exception as e:
+                if isinstance(e, (ApiError, NetworkError)):
+                    if replayable and self._should_rethrottle(e, throttled):
+                        limiter.throttled(e.retry_after)
+                        throttled += 1
+                        continue
+                    if retryable and policy.should_retry(e, retried + 1):
+                        retried += 1
+                        policy.sleep(policy.delay(retried))
+                        continue
+                    e.retries = throttled + retried
+                self._local.retries = throttled + retried
+                if timing is not None:
+                    self._notify(
+                        method, url, data, timing, start,
+                        throttled + retried, type(e))
+                raise
+            if limiter is not None:
+                limiter.succeeded()
+            self._local.retries = throttled + retried
+            if timing is not None:
+                self._notify(
+                    method, url, data, timing, start,
+                    throttled + retried, None)
+            return response_obj
+
+    @property
+    def last_retries(self):
+        """number of retries made by this thread's last request"""
+        return getattr(self._local, 'retries', 0)
+
+    def _send(
+            self,
+            method,
+            url,
+            request_headers,
+            data,
+            stream=False,
+            timing=None,
+            cache_lookup=None):
+        # :param timing - dict filled with the timings and sizes of this
+        # attempt for RequestEvent, None when nobody observes requests
+        # :param cache_lookup - the HttpCache lookup of a cacheable GET
+        headers = dict(request_headers or {})
+        headers['Authorization'] = self._authorization
+        if timing is not None:
+            timing.clear()
+            sent = _monotonic()
+        with rewrite_requests_error(self._transport.errors):
+            response = self._transport.request(
+                method,
+                url,
+                headers=headers,
+                data=data,
+                stream=stream)
+            if not stream:
+                # transports may read the body lazily
+                response.content
+        if timing is not None:
+            # elapsed only runs until the response headers arrived
+            timing['status_code'] = response.status_code
+            timing['ttfb'] = response.elapsed
+            if not stream and response.elapsed is not None:
+                timing['download'] = max(
+                    0.0,
+                    _monotonic() - sent - response.elapsed)
+            if not stream:
+                timing['response_bytes'] = len(response.content)
+
+        try:
+            if cache_lookup is not None and response.status_code == 304 \
+                    and cache_lookup.entry is not None:
+                return self._http_cache.not_modified(cache_lookup)
+            self._check_content_type(
+                url,
+                response.headers.get('content-type'))
+            if stream and self._is_hundreth(2, response.status_code):
+                return self._iter_response(response)
+            data = self._handle_response(
+                response.status_code,
+                self._json.loads(response.content),
+                response.headers)
+            if cache_lookup is not None:
+                self._http_cache.store(
+                    cache_lookup,
+                    url,
+                    response.content,
+                    data,
+                    response.headers)
+            return data
+        except Exception:
+            response.close()
+            raise
+
+    def _iter_response(self, response):
+        try:
+            for element in iter_json_array(self._iter_chunks(response)):
+                if sys.version_info[0] < 3:
+                    element = self._fix_unicode(element)
+                yield element
+        finally:
+            response.close()
+
+    def _iter_chunks(self, response):
+        chunks = response.iter_content(self.STREAM_CHUNK_SIZE)
+        while True:
+            with rewrite_requests_error(self._transport.errors):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+
+_monotonic = getattr(time, 'monotonic', time.time)
+_missing = object()
+
+
+class TTLCache:
+    """
+    Thread-safe mapping whose entries expire ttl seconds after they are set
+    and which evicts the least recently used entry once it holds more than
+    maxsize entries. hits and misses count get() lookups.
+
+    maxsize :int
+    ttl :number of seconds, None for entries that never expire
+    timer :callable returning the current time in seconds
+    """
+
+    def __init__(self, maxsize=256, ttl=60, timer=_monotonic):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and not self._expired(entry):
+                self._entries[key] = entry
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (self._timer(), value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key, create):
+        value = self.get(key, _missing)
+        if value is _missing:
+            value = create()
+            self.set(key, value)
+        return value
+
+    def grow(self, maxsize):
+        """raises maxsize to at least maxsize, it is never lowered"""
+        with self._lock:
+            self.maxsize = max(self.maxsize, maxsize)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expired(self, entry):
+        return self.ttl is not None and self._timer() - entry[0] >= self.ttl
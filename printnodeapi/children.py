@@ -0,0 +1,135 @@
+import threading
+from collections import namedtuple
+
+from .gateway import Gateway
+from .transport import RequestsTransport
+from .util import imap_bounded
+
+ChildResult = namedtuple('ChildResult', ['child', 'result', 'error'])
+ChildRecord = namedtuple('ChildRecord', ['child', 'record'])
+
+_CHILD_ARGUMENTS = {
+    'id': 'child_id',
+    'email': 'child_email',
+    'ref': 'child_ref'}
+
+
+class ChildAccountPool:
+    """
+    Gateways to many child accounts of one parent api key, sharing a single
+    transport and so a single connection pool. Each child's requests carry
+    the X-Child-Account-By-* header selected by by. Fan-out calls run on up
+    to max_workers threads at once.
+
+    Other keyword arguments (rate_limiter, retry_policy, observers,
+    ...) are passed to every child's Gateway, so a RateLimiter given here
+    paces the parent key across all children. Pass resolution_cache=True
+    rather than a TTLCache so that each child gets a cache of its own.
+
+    apikey :str, api key of the parent account
+    children :iterable of child ids, emails or creator refs
+    by :'id', 'email' or 'ref'
+    max_workers :int
+    transport :transport shared by every child, a RequestsTransport with
+    max_workers connections by default
+    """
+
+    def __init__(
+            self,
+            apikey,
+            children,
+            by='id',
+            max_workers=8,
+            url=Gateway.URL,
+            transport=None,
+            **kwargs):
+        if by not in _CHILD_ARGUMENTS:
+            raise ValueError('by must be one of id, email or ref')
+        self._owns_transport = transport is None
+        if transport is None:
+            transport = RequestsTransport(
+                pool_maxsize=max(max_workers, 1),
+                verify=kwargs.pop('sslcert', None))
+        self._apikey = apikey
+        self._by = by
+        self._url = url
+        self._transport = transport
+        self._kwargs = kwargs
+        self.max_workers = max_workers
+        self.children = list(children)
+        self._lock = threading.Lock()
+        self._gateways = {}
+
+    def close(self):
+        if self._owns_transport:
+            self._transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def child(self, child):
+        """the Gateway of child, created once and kept"""
+        with self._lock:
+            gateway = self._gateways.get(child)
+            if gateway is None:
+                kwargs = dict(self._kwargs)
+                kwargs[_CHILD_ARGUMENTS[self._by]] = str(child)
+                gateway = self._gateways[child] = Gateway(
+                    url=self._url,
+                    apikey=self._apikey,
+                    transport=self._transport,
+                    **kwargs)
+        return gateway
+
+    def map(self, f, children=None, ordered=True):
+        """
+        Calls f with the Gateway of every child (all children by default)
+        concurrently, yields a ChildResult per child holding what f returned
+        or the exception it raised.
+        """
+
+        def call(child):
+            try:
+                return ChildResult(child, f(self.child(child)), None)
+            except Exception as e:
+                return ChildResult(child, None, e)
+
+        return imap_bounded(
+            call,
+            ((child,) for child in (
+                self.children if children is None else children)),
+            max_workers=self.max_workers,
+            ordered=ordered)
+
+    def collect(self, f, children=None):
+        """
+        Like map, but merges the records f returns for every child into one
+        list of ChildRecords, in children order. Raises the first error
+        once every child is done, with the failing child as error.child.
+        """
+        records = []
+        error = None
+        for child, result, e in self.map(f, children):
+            if e is not None:
+                if error is None:
+                    error = e
+                    error.child = child
+                continue
+            if not isinstance(result, list):
+                result = [result]
+            records.extend(ChildRecord(child, r) for r in result)
+        if error is not None:
+            raise error
+        return records
+
+    def computers(self, *args, **kwargs):
+        return self.collect(lambda g: g.computers(*args, **kwargs))
+
+    def printers(self, *args, **kwargs):
+        return self.collect(lambda g: g.printers(*args, **kwargs))
+
+    def printjobs(self, *args, **kwargs):
+        return self.collect(lambda g: g.printjobs(*args, **kwargs))
@@ -1,181 +1,88 @@
+from printnodeapi.jobhandle import PrintJobRefresher
 from printnodeapi.model import Computer, Model, Printer, PrintJob, Scale, State
-from future.types import newbytes
-import json
+from printnodeapi.retry import IDEMPOTENCY_HEADER
+from printnodeapi.snapshot import DirectorySnapshot
+from printnodeapi.upload import Base64File, JsonBody
+from printnodeapi.util import imap_bounded
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 import base64 as base_64
 import sys
+import threading
 
 
-class Computers:
+SubmitResult = namedtuple('SubmitResult', [
+    'index',
+    'job',
+    'printjob_id',
+    'error'])
+
+
+class BaseComputers:
+    """
+    Builds the urls of the computer, printer and printjob queries and turns
+    their responses into models. Computers and aio.AsyncComputers add the
+    requests, made synchronously or awaited.
+    """
 
     def __init__(self, auth, factory):
         self._auth = auth
         self._factory = factory
 
-    def get_computers(self, computer=None, limit=None, after=None, dir=None):
-
-        params = self._create_pagination_params(limit, after, dir)
-
-        if self._is_multi_query(computer):
-            url = '/computers'
-            if params is not None:
-                url = url + '?' + params
-            computers = self._factory.create_computers(self._auth.get(url))
-            if isinstance(computer, str):
-                return [c for c in computers if c.name == computer]
-            else:
-                return computers
-        else:
-            computer_id = self._get_computer_id(computer)
-            url = '/computers/{}'.format(computer_id)
-            if params is not None:
-                url = url + '?' + params
-            results = self._auth.get(url)
-            if len(results) == 0:
-                raise LookupError(
-                    'computer not found with ID {}'.format(computer_id))
-            assert len(results) == 1
-            computers = self._factory.create_computers(results)
-            return computers[0]
-
-    def get_scales(self, computer, dev_name=None, dev_num=None):
-        url = '/computer/'+str(computer)+'/scales'
-        if dev_name is not None:
-            url = url+'/'+dev_name
-            if dev_num is not None:
-                url = url+'/'+str(dev_num)
-        if dev_num is not None and dev_name is None:
-            temp_str = 'Device num stated without name - nothing found.'
-            raise LookupError(temp_str)
-        scales = self._factory.create_scales(self._auth.get(url))
-        return scales
+    def _send_printjob(self, printjob_data, idempotency_key):
+        request_headers = self._idempotency_headers(idempotency_key)
 
-    def get_states(self, pjob_set=None, limit=None, after=None, dir=None):
+        if isinstance(printjob_data['content'], Base64File):
+            printjob_data = JsonBody(printjob_data)
+            request_headers = dict(
+                request_headers or {},
+                **{'Content-Type': 'application/json'})
 
-        pjob_set = str(pjob_set)+"/" if pjob_set else ""
-        url = "/printjobs/"+pjob_set+"states"
-        params = self._create_pagination_params(limit, after, dir)
-        if params is not None:
-            url = url + '?' + params
-        states = self._factory.create_states_map(
-            self._auth.get(url))
+        return self._auth.post('/printjobs', printjob_data, request_headers)
 
-        return states
+    def _idempotency_headers(self, idempotency_key):
+        if idempotency_key is None:
+            return None
+        return {IDEMPOTENCY_HEADER: str(idempotency_key)}
 
-    def get_printers(self, computer=None, printer=None, limit=None, after=None, dir=None):
-        """queries API for printers.
-        the printer argument can be:
-        * id of the printer, in which case a single printer is returned
-        * name of the printer, in which case a single printer is returned
-        * unspecified in which case a list of all printers is returned
-        the computer argument can be:
-        * id of the computer in which case only printers that are attached
-        to that computer are returned
-        * unspecified in which case all printers attached to the account
-        are considered.
-        raises LookupError if querying for a specific printer
-        that doesn't exist
-        """
-
-        params = self._create_pagination_params(limit, after, dir)
-
-        if self._is_multi_query(printer):
-            computer_ids = ','.join(map(str, self._get_computer_ids(computer)))
-            url = '/computers/{}/printers'.format(computer_ids)
-            if params is not None:
-                url = url + '?' + params
-            printers = self._factory.create_printers(self._auth.get(url))
-            assert all(isinstance(p, Printer) for p in printers)
-            if isinstance(printer, str):
-                return [p for p in printers if p.name == printer]
-            else:
-                return printers
-        else:
-            printer_id = self._get_printer_id(printer)
-            url = '/printers/{}'.format(printer_id)
-            if params is not None:
-                url = url + '?' + params
-            printers = self._factory.create_printers(self._auth.get(url))
-            assert all(isinstance(p, Printer) for p in printers)
-            if len(printers) == 0:
-                raise LookupError('no printer with ID {}'.format(printer_id))
-            return printers[0]
-
-    def get_printjobs(self, computer=None, printer=None, printjob=None, limit=None, after=None, dir=None):
-        params = self._create_pagination_params(limit, after, dir)
-
-        if self._is_multi_query(printjob):
-            if computer is None and printer is None:
-                url = '/printjobs'
-                if params is not None:
-                    url = url + '?' + params
-                printjobs = self._factory.create_printjobs(self._auth.get(url))
-                if isinstance(printjob, str):
-                    return [pj for pj in printjobs if pj.title == printjob]
-                else:
-                    return printjobs
-            else:
-                printers = self.get_printers(
-                    computer=computer,
-                    printer=printer)
-                if self._is_multi_query(printer):
-                    if len(printers) == 0:
-                        return []
-                else:
-                    printers = [printers]
-                printer_ids = [p.id for p in printers]
-                printer_url = ','.join(map(str, printer_ids))
-                url = '/printers/{}/printjobs'.format(printer_url)
-                if params is not None:
-                    url = url + '?' + params
-                printjobs = self._factory.create_printjobs(self._auth.get(url))
-
-                if isinstance(printjob, str):
-                    return [pj for pj in printjobs if pj.title == printjob]
-                else:
-                    return printjobs
-        else:
-            printjob_id = self._get_printjob_id(printjob)
-            results = self._auth.get('/printjobs/{}'.format(printjob_id))
-            printjobs = self._factory.create_printjobs(results)
-            if len(printjobs) == 0:
-                raise LookupError('no printjob with ID {}'.format(printjob_id))
-            return printjobs[0]
-
-    # could use the default printer if none is provided
-    def submit_printjob(
-            self,
-            computer=None,
-            printer=None,
-            job_type='pdf',  # PDF|RAW
-            title='PrintJob',
-            qty=None,
-            options=None,
-            authentication=None,
-            uri=None,
-            base64=None,
-            binary=None):
-        printers = self.get_printers(computer=computer, printer=printer)
+    def _single_printer_id(self, printers):
         assert isinstance(printers, (list, Printer))
         if isinstance(printers, list):
             if len(printers) == 0:
                 raise LookupError('printer not found')
             elif len(printers) > 1:
-                printer_ids = ','.join(p.id for p in printers)
+                printer_ids = ','.join(str(p.id) for p in printers)
                 msg = 'multiple printers match destination: {}'.format(
                     printer_ids)
                 raise LookupError(msg)
-            printer_id = printers[0].id
+            return printers[0].id
         else:
-            printer_id = printers.id
+            return printers.id
 
+    def _create_printjob_data(
+            self,
+            printer_id,
+            job_type,
+            title,
+            qty,
+            options,
+            authentication,
+            uri,
+            base64,
+            binary,
+            path=None,
+            file=None):
         if job_type not in ['pdf', 'raw', 'binary']:
             raise ValueError('only support job_type of pdf or raw')
-        if len([x for x in [uri, base64, binary] if x is not None]) != 1:
+        contents = [uri, base64, binary, path, file]
+        if len([x for x in contents if x is not None]) != 1:
             raise ValueError('one and only one of the following parameters '
-                             'is needed: uri, base64, or binary')
+                             'is needed: uri, base64, binary, path or file')
 
         if binary is not None:
             if sys.version_info[0] < 3:
+                from future.types import newbytes
                 binary_bytes = newbytes(binary)
             else:
                 if isinstance(binary, str):
@@ -184,6 +91,8 @@ class Computers:
                     binary_bytes = binary
             base64 = base_64.b64encode(binary_bytes)
             base64 = base64.decode('utf-8')
+        elif path is not None or file is not None:
+            base64 = Base64File(path if path is not None else file)
 
         printjob_data = {
             'printerId': printer_id,
@@ -201,31 +110,14 @@ class Computers:
         if qty is not None:
             printjob_data.update({"qty": qty})
 
-        printjob_id = self._auth.post('/printjobs', printjob_data)
-
-        return printjob_id
-
-    def _native(self, obj):
-        if hasattr(obj, '__native__'):
-            return obj.__native__()
-        else:
-            return obj
+        return printjob_data
 
-    def _get_computer_ids(self, computer):
+    def _given_computer_ids(self, computer):
+        # ids of a computer given by id or model, which need no request
         if isinstance(computer, int):
             return [computer]
         elif isinstance(computer, Computer):
             return [computer.id]
-        elif computer is None or isinstance(computer, str):
-            computers = [
-                self._factory.create_computer(comp)
-                for comp in self._auth.get('/computers')]
-            if isinstance(computer, str):
-                computers = [
-                    comp
-                    for comp in computers
-                    if comp.name == computer]
-            return [c.id for c in computers]
         else:
             raise TypeError('computer: "{}"'.format(type(computer)))
 
@@ -246,22 +138,6 @@ class Computers:
         else:
             raise TypeError(str(type(model)))
 
-    def _get_printer_ids(self, printer):
-        if isinstance(printer, int):
-            return [printer]
-        elif isinstance(printer, Printer):
-            return [Printer.id]
-        elif printer is None or isinstance(printer, str):
-            printers = {
-                self._factory.create_printer(printer_dict)
-                for printer_dict in self._auth.get('/printer')}
-            if isinstance(printer, str):
-                printers = {
-                    p for p in printers if p.name == printer}
-            return printers
-        else:
-            raise TypeError('printer: "{}"'.format(type(printer)))
-
     def _is_multi_query(self, obj):
         if obj is None:
             return True
@@ -274,15 +150,6 @@ class Computers:
         else:
             raise TypeError('type "{}" unsupported'.format(type(obj)))
 
-    def _get_printer_by_name(self, printer_name, computer_id=None):
-        assert isinstance(printer_name, str)
-        assert not computer_id or isinstance(computer_id, int)
-        printers = self.get_printers(computer=computer_id)
-        return [
-            printer
-            for printer in printers
-            if printer.name == printer_name]
-
     def _create_pagination_params(self, limit, after, dir):
         params = []
         if limit is not None:
@@ -303,6 +170,597 @@ class Computers:
         if len(params) > 0:
             return '&'.join(params)
 
+    def _computers_url(self, computer, params):
+        if self._is_multi_query(computer):
+            url = '/computers'
+        else:
+            url = '/computers/{}'.format(self._get_computer_id(computer))
+        return _with_params(url, params)
+
+    def _computers_result(self, computer, results):
+        if self._is_multi_query(computer):
+            return _named(self._factory.create_computers(results), computer)
+        if len(results) == 0:
+            raise LookupError('computer not found with ID {}'.format(
+                self._get_computer_id(computer)))
+        assert len(results) == 1
+        return self._factory.create_computers(results)[0]
+
+    def _scales_url(self, computer, dev_name, dev_num):
+        if dev_num is not None and dev_name is None:
+            temp_str = 'Device num stated without name - nothing found.'
+            raise LookupError(temp_str)
+        url = '/computer/'+str(computer)+'/scales'
+        if dev_name is not None:
+            url = url+'/'+dev_name
+            if dev_num is not None:
+                url = url+'/'+str(dev_num)
+        return url
+
+    def _states_url(self, pjob_set, params):
+        pjob_set = str(pjob_set)+"/" if pjob_set else ""
+        return _with_params("/printjobs/"+pjob_set+"states", params)
+
+    def _printers_url(self, computer_ids, printer, params):
+        # :param computer_ids - the computers to list printers of, only
+        # used when printer is a multi query
+        if self._is_multi_query(printer):
+            url = '/computers/{}/printers'.format(
+                ','.join(map(str, computer_ids)))
+        else:
+            url = '/printers/{}'.format(self._get_printer_id(printer))
+        return _with_params(url, params)
+
+    def _printers_result(self, printer, results):
+        printers = self._factory.create_printers(results)
+        assert all(isinstance(p, Printer) for p in printers)
+        if self._is_multi_query(printer):
+            return _named(printers, printer)
+        if len(printers) == 0:
+            raise LookupError('no printer with ID {}'.format(
+                self._get_printer_id(printer)))
+        return printers[0]
+
+    def _printjobs_url(self, printers, printjob, params):
+        # :param printers - result of get_printers for the destination
+        # whose printjobs are listed, None for every printjob
+        # returns None when the destination has no printers
+        if not self._is_multi_query(printjob):
+            return '/printjobs/{}'.format(self._get_printjob_id(printjob))
+        if printers is None:
+            url = '/printjobs'
+        else:
+            if not isinstance(printers, list):
+                printers = [printers]
+            if len(printers) == 0:
+                return None
+            url = '/printers/{}/printjobs'.format(
+                ','.join(str(p.id) for p in printers))
+        return _with_params(url, params)
+
+    def _printjobs_result(self, printjob, results):
+        printjobs = self._factory.create_printjobs(results)
+        if self._is_multi_query(printjob):
+            return _named(printjobs, printjob, 'title')
+        if len(printjobs) == 0:
+            raise LookupError('no printjob with ID {}'.format(
+                self._get_printjob_id(printjob)))
+        return printjobs[0]
+
+
+class Computers(BaseComputers):
+
+    # limits of the comma separated id set sent in one get_*_many request,
+    # the API pages sets of more than 100 records and servers and proxies
+    # reject urls beyond a few kilobytes
+    MANY_BATCH_SIZE = 100
+    MANY_IDS_LENGTH = 1500
+
+    def __init__(self, auth, factory, cache=None):
+        # :param cache - optional TTLCache remembering how destinations
+        # resolve to Printer/Computer models
+        BaseComputers.__init__(self, auth, factory)
+        self._cache = cache
+        # the size asked for, which a loaded directory is added to
+        self._cache_maxsize = cache.maxsize if cache is not None else None
+        self._refresher = PrintJobRefresher(auth, factory)
+
+    def get_computers(self, computer=None, limit=None, after=None, dir=None):
+        params = self._create_pagination_params(limit, after, dir)
+        url = self._computers_url(computer, params)
+        return self._computers_result(computer, self._auth.get(url))
+
+    def get_scales(self, computer, dev_name=None, dev_num=None):
+        url = self._scales_url(computer, dev_name, dev_num)
+        return self._factory.create_scales(self._auth.get(url))
+
+    def get_states(self, pjob_set=None, limit=None, after=None, dir=None):
+        params = self._create_pagination_params(limit, after, dir)
+        url = self._states_url(pjob_set, params)
+        return self._factory.create_states_map(self._auth.get(url))
+
+    def get_printers(self, computer=None, printer=None, limit=None, after=None, dir=None):
+        """queries API for printers.
+        the printer argument can be:
+        * id of the printer, in which case a single printer is returned
+        * name of the printer, in which case a single printer is returned
+        * unspecified in which case a list of all printers is returned
+        the computer argument can be:
+        * id of the computer in which case only printers that are attached
+        to that computer are returned
+        * unspecified in which case all printers attached to the account
+        are considered.
+        raises LookupError if querying for a specific printer
+        that doesn't exist
+        """
+
+        params = self._create_pagination_params(limit, after, dir)
+        computer_ids = None
+        if self._is_multi_query(printer):
+            computer_ids = self._get_computer_ids(computer)
+        url = self._printers_url(computer_ids, printer, params)
+        return self._printers_result(printer, self._auth.get(url))
+
+    def get_printjobs(self, computer=None, printer=None, printjob=None, limit=None, after=None, dir=None):
+        params = self._create_pagination_params(limit, after, dir)
+        printers = None
+        if self._is_multi_query(printjob) and (
+                computer is not None or printer is not None):
+            printers = self.get_printers(computer=computer, printer=printer)
+        url = self._printjobs_url(printers, printjob, params)
+        if url is None:
+            return []
+        return self._printjobs_result(printjob, self._auth.get(url))
+
+    def get_computers_many(self, ids, max_workers=4):
+        """fetches the computers with the given ids (or models), returns
+        a dict of id to Computer. ids that don't exist are left out.
+        the ids are sent in chunks of at most MANY_BATCH_SIZE ids and
+        MANY_IDS_LENGTH characters, up to max_workers chunks at a time.
+        """
+        return self._get_many(
+            '/computers/{}',
+            [self._get_computer_id(c) for c in ids],
+            self._factory.create_computers,
+            max_workers)
+
+    def get_printers_many(self, ids, max_workers=4):
+        """like get_computers_many, for printers"""
+        return self._get_many(
+            '/printers/{}',
+            [self._get_printer_id(p) for p in ids],
+            self._factory.create_printers,
+            max_workers)
+
+    def get_printjobs_many(self, ids, max_workers=4):
+        """like get_computers_many, for printjobs"""
+        return self._get_many(
+            '/printjobs/{}',
+            [self._get_printjob_id(pj) for pj in ids],
+            self._factory.create_printjobs,
+            max_workers)
+
+    def iter_computers(
+            self,
+            page_size=100,
+            after=None,
+            dir=None,
+            prefetch=False,
+            stream=False):
+        """yields every computer of the account, following the after
+        cursor one page of page_size computers at a time.
+        with prefetch the next page is downloaded while the current one
+        is consumed. with stream each page is decoded incrementally as it
+        is read from the connection, so a page_size of None (no paging) can
+        walk any number of records with constant memory.
+        """
+        return self._iter_pages(
+            '/computers',
+            partial(self._factory.create_computer, intern=False),
+            page_size,
+            after,
+            dir,
+            prefetch,
+            stream)
+
+    def iter_printers(
+            self,
+            computer=None,
+            page_size=100,
+            after=None,
+            dir=None,
+            prefetch=False,
+            stream=False):
+        """yields every printer of the account, or of the computer given
+        by id, model or name, page by page like iter_computers.
+        """
+        if computer is None:
+            url = '/printers'
+        else:
+            url = self._printers_url(
+                self._get_computer_ids(computer),
+                None,
+                None)
+        return self._iter_pages(
+            url,
+            partial(self._factory.create_printer, intern=False),
+            page_size,
+            after,
+            dir,
+            prefetch,
+            stream)
+
+    def iter_printjobs(
+            self,
+            computer=None,
+            printer=None,
+            page_size=100,
+            after=None,
+            dir=None,
+            prefetch=False,
+            stream=False):
+        """yields every printjob of the account, or of the printers
+        selected by computer and printer as in get_printjobs, page by page
+        like iter_computers.
+        """
+        printers = None
+        if computer is not None or printer is not None:
+            printers = self.get_printers(computer=computer, printer=printer)
+        url = self._printjobs_url(printers, None, None)
+        if url is None:
+            return iter([])
+        return self._iter_pages(
+            url,
+            self._factory.create_printjob,
+            page_size,
+            after,
+            dir,
+            prefetch,
+            stream)
+
+    def iter_states(
+            self,
+            pjob_set=None,
+            page_size=100,
+            after=None,
+            dir=None,
+            prefetch=False,
+            stream=False):
+        """yields the list of states of every printjob, or of the printjobs
+        in pjob_set, page by page like iter_computers.
+        """
+        return self._iter_pages(
+            self._states_url(pjob_set, None),
+            self._factory.create_states,
+            page_size,
+            after,
+            dir,
+            prefetch,
+            stream,
+            cursor=_states_cursor)
+
+    # could use the default printer if none is provided
+    def submit_printjob(
+            self,
+            computer=None,
+            printer=None,
+            job_type='pdf',  # PDF|RAW
+            title='PrintJob',
+            qty=None,
+            options=None,
+            authentication=None,
+            uri=None,
+            base64=None,
+            binary=None,
+            idempotency_key=None,
+            path=None,
+            file=None,
+            lazy=False):
+        # idempotency_key: client generated key sent as X-Idempotency-Key,
+        # the API won't create a second job for a repeated key which lets
+        # a RetryPolicy retry the submission safely
+        # path/file: document to print, given by path or as a binary file
+        # object, which is base64 encoded chunk by chunk while it is sent
+        # lazy: return a PrintJobHandle instead of the id, a printer given
+        # by id or model is then used as is without looking it up first
+        if lazy and computer is None and isinstance(printer, (int, Printer)):
+            printer_id = self._get_printer_id(printer)
+        else:
+            printer_id = self._resolve_printer_id(computer, printer)
+        printjob_data = self._create_printjob_data(
+            printer_id,
+            job_type,
+            title,
+            qty,
+            options,
+            authentication,
+            uri,
+            base64,
+            binary,
+            path,
+            file)
+        printjob_id = self._send_printjob(printjob_data, idempotency_key)
+
+        if lazy:
+            return self._refresher.handle(printjob_id, printjob_data)
+        return printjob_id
+
+    def refresh_printjobs(self, handles):
+        """fetches the current state of many PrintJobHandles, batching
+        their ids into as few requests as possible.
+        """
+        self._refresher.refresh(handles)
+
+    def submit_printjobs(self, jobs, max_workers=8, ordered=True):
+        """submits many printjobs concurrently.
+        jobs is an iterable of dicts holding the keyword arguments of
+        submit_printjob. Jobs are posted by a pool of max_workers threads
+        and each destination (computer/printer pair) is only looked up once.
+        Yields a SubmitResult per job, either in submission order or, with
+        ordered=False, as soon as each job completes. A failing job does not
+        stop the others, its exception is returned in SubmitResult.error.
+        """
+        destinations = _DestinationMemo(self._resolve_printer_id)
+
+        def submit(index, job):
+            fields = dict(job)
+            try:
+                printer_id = destinations.get(
+                    fields.pop('computer', None),
+                    fields.pop('printer', None))
+                printjob_id = self._post_printjob(printer_id, **fields)
+            except Exception as e:
+                return SubmitResult(index, job, None, e)
+            return SubmitResult(index, job, printjob_id, None)
+
+        return imap_bounded(
+            submit,
+            enumerate(jobs),
+            max_workers=max_workers,
+            ordered=ordered)
+
+    def _resolve_printer_id(self, computer, printer):
+        if self._cache is None:
+            printers = self.get_printers(computer=computer, printer=printer)
+        else:
+            key = ('printers', _model_key(computer), _model_key(printer))
+            printers = self._cache.get_or_set(
+                key,
+                lambda: self._get_printers_for_cache(computer, printer))
+        return self._single_printer_id(printers)
+
+    def _get_printers_for_cache(self, computer, printer):
+        printers = self.get_printers(computer=computer, printer=printer)
+        # index every printer found by id so later lookups by id hit too
+        for p in printers if isinstance(printers, list) else [printers]:
+            self._cache.set(('printers', None, p.id), p)
+        return printers
+
+    def invalidate_cache(self):
+        if self._cache is not None:
+            self._cache.clear()
+
+    def save_directory(self, path, page_size=500):
+        """downloads every computer and printer, saves them to path as a
+        DirectorySnapshot and fills the resolution cache with them.
+        returns the snapshot.
+        """
+        def record(item, memo):
+            return item
+
+        snapshot = DirectorySnapshot(
+            list(self._iter_pages(
+                '/computers', record, page_size, None, None, False, False)),
+            list(self._iter_pages(
+                '/printers', record, page_size, None, None, False, False)))
+        snapshot.save(path)
+        self._fill_cache(snapshot)
+        return snapshot
+
+    def load_directory(self, path, refresh=True, max_age=None):
+        """fills the resolution cache from the DirectorySnapshot saved at
+        path, unless it is missing or older than max_age seconds, so that
+        printers can be resolved without a request.
+        with refresh the directory is then downloaded again by a background
+        thread, which refills the cache and saves the new snapshot, and a
+        Future of that snapshot is returned. without refresh, returns the
+        loaded snapshot or None.
+        the cache grows to hold the whole directory, its entries still
+        expire after the cache's ttl like any other.
+        """
+        if self._cache is None:
+            raise ValueError('load_directory needs a resolution_cache')
+        snapshot = DirectorySnapshot.load(path)
+        if snapshot is not None and (
+                max_age is None or snapshot.age <= max_age):
+            self._fill_cache(snapshot)
+        else:
+            snapshot = None
+        if not refresh:
+            return snapshot
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(self.save_directory(path))
+            except Exception as e:
+                future.set_exception(e)
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        return future
+
+    def _fill_cache(self, snapshot):
+        # the entries _resolve_printer_id and _get_computer_ids look up,
+        # for destinations given by id or name
+        if self._cache is None:
+            return
+        computers = self._factory.create_computers(snapshot.computers)
+        printers = self._factory.create_printers(snapshot.printers)
+        groups = {}
+        for p in printers:
+            for key in (
+                    ('printers', None, p.name),
+                    ('printers', p.computer.id, None),
+                    ('printers', p.computer.name, None)):
+                groups.setdefault(key, []).append(p)
+        # grow the cache so that the least recently used eviction doesn't
+        # drop most of a large directory while it is being loaded
+        self._cache.grow(
+            self._cache_maxsize + 1 + len(printers) + len(groups))
+        self._cache.set(('computers',), computers)
+        for p in printers:
+            self._cache.set(('printers', None, p.id), p)
+        for key, group in groups.items():
+            self._cache.set(key, group)
+
+    def _post_printjob(
+            self,
+            printer_id,
+            job_type='pdf',
+            title='PrintJob',
+            qty=None,
+            options=None,
+            authentication=None,
+            uri=None,
+            base64=None,
+            binary=None,
+            idempotency_key=None,
+            path=None,
+            file=None):
+        printjob_data = self._create_printjob_data(
+            printer_id,
+            job_type,
+            title,
+            qty,
+            options,
+            authentication,
+            uri,
+            base64,
+            binary,
+            path,
+            file)
+        return self._send_printjob(printjob_data, idempotency_key)
+
+    def _native(self, obj):
+        if hasattr(obj, '__native__'):
+            return obj.__native__()
+        else:
+            return obj
+
+    def _get_computer_ids(self, computer):
+        if computer is None or isinstance(computer, str):
+            if self._cache is None:
+                computers = self._get_all_computers()
+            else:
+                computers = self._cache.get_or_set(
+                    ('computers',),
+                    self._get_all_computers)
+            return [c.id for c in _named(computers, computer)]
+        return self._given_computer_ids(computer)
+
+    def _get_all_computers(self):
+        return self._factory.create_computers(self._auth.get('/computers'))
+
+    def _get_printer_ids(self, printer):
+        if isinstance(printer, int):
+            return [printer]
+        elif isinstance(printer, Printer):
+            return [Printer.id]
+        elif printer is None or isinstance(printer, str):
+            printers = {
+                self._factory.create_printer(printer_dict)
+                for printer_dict in self._auth.get('/printer')}
+            if isinstance(printer, str):
+                printers = {
+                    p for p in printers if p.name == printer}
+            return printers
+        else:
+            raise TypeError('printer: "{}"'.format(type(printer)))
+
+    def _get_many(self, url, ids, create, max_workers):
+        chunks = _id_chunks(
+            ids,
+            self.MANY_BATCH_SIZE,
+            self.MANY_IDS_LENGTH)
+
+        def fetch(chunk):
+            return create(self._auth.get(url.format(chunk)))
+
+        if len(chunks) == 1:
+            pages = [fetch(chunks[0])]
+        else:
+            pages = imap_bounded(
+                fetch,
+                ((chunk,) for chunk in chunks),
+                max_workers=max_workers,
+                ordered=False)
+        return {model.id: model for page in pages for model in page}
+
+    def _get_printer_by_name(self, printer_name, computer_id=None):
+        assert isinstance(printer_name, str)
+        assert not computer_id or isinstance(computer_id, int)
+        printers = self.get_printers(computer=computer_id)
+        return [
+            printer
+            for printer in printers
+            if printer.name == printer_name]
+
+    def _iter_pages(
+            self,
+            url,
+            create,
+            page_size,
+            after,
+            dir,
+            prefetch,
+            stream,
+            cursor=lambda item: item['id']):
+        if page_size is not None and (
+                not isinstance(page_size, int) or page_size < 1):
+            raise ValueError('page_size must be None or a positive int')
+        if prefetch and stream:
+            raise ValueError('prefetch and stream can\'t be combined')
+
+        def fetch(after):
+            params = self._create_pagination_params(page_size, after, dir)
+            page_url = url if params is None else url + '?' + params
+            if stream:
+                return self._auth.get_stream(page_url)
+            return self._auth.get(page_url)
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            page = fetch(after)
+            while True:
+                # models are shared within a page only, so a walk keeps
+                # no more than one page of them alive
+                memo = self._factory.new_memo()
+                next_page = None
+                if (executor is not None and page_size is not None and
+                        len(page) >= page_size and
+                        cursor(page[-1]) is not None):
+                    next_page = executor.submit(fetch, cursor(page[-1]))
+                count = 0
+                for item in page:
+                    count += 1
+                    last_item = item
+                    yield create(item, memo)
+                if page_size is None or count < page_size:
+                    break
+                last = cursor(last_item)
+                if last is None:
+                    break
+                if next_page is not None:
+                    page = next_page.result()
+                else:
+                    page = fetch(last)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+
 class LookupFailedError(RuntimeError):
 
     def __init__(self, obj_name, field, value):
@@ -315,3 +773,77 @@ class LookupFailedError(RuntimeError):
         self.obj_name = obj_name
         self.field = field
         self.value = value
+
+
+class _DestinationMemo:
+    # resolves each destination once, concurrent lookups of the same
+    # destination wait for the first one instead of repeating it
+
+    def __init__(self, resolve):
+        self._resolve = resolve
+        self._lock = threading.Lock()
+        self._futures = {}
+
+    def get(self, computer, printer):
+        key = (_model_key(computer), _model_key(printer))
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = Future()
+        if owner:
+            try:
+                future.set_result(self._resolve(computer, printer))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+
+def _id_chunks(ids, batch_size, max_length):
+    # comma separated sets of the distinct ids, in order, each of at most
+    # batch_size ids and max_length characters
+    chunks = []
+    chunk = []
+    length = 0
+    for i in _unique(str(i) for i in ids):
+        if chunk and (
+                len(chunk) == batch_size or
+                length + 1 + len(i) > max_length):
+            chunks.append(','.join(chunk))
+            chunk = []
+            length = 0
+        length += len(i) + (1 if chunk else 0)
+        chunk.append(i)
+    if chunk:
+        chunks.append(','.join(chunk))
+    return chunks
+
+
+def _with_params(url, params):
+    return url if params is None else url + '?' + params
+
+
+def _named(models, name, field='name'):
+    # the models whose field equals name, or all of them unless name is a str
+    if isinstance(name, str):
+        return [m for m in models if getattr(m, field) == name]
+    return models
+
+
+def _unique(items):
+    seen = set()
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            yield item
+
+
+def _states_cursor(states):
+    return states[0]['printJobId'] if states else None
+
+
+def _model_key(obj):
+    # hashable stand-in for a destination argument
+    if isinstance(obj, Model):
+        return (type(obj).__name__, obj.id)
+    return obj
@@ -0,0 +1,96 @@
+"""The exceptions raised by the client."""
+
+
+class ApiError(RuntimeError):
+    retries = 0
+
+    def __init__(self, status_code, code, message, uid=None, **remaining):
+        super(ApiError, self).__init__('{}({}): {}'.format(
+            code,
+            status_code,
+            message))
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+        self.uid = uid
+
+
+class ClientError(ApiError):
+    pass
+
+
+class Unauthorized(ClientError):
+    pass
+
+
+class TooManyRequests(ClientError):
+    def __init__(
+            self,
+            status_code,
+            code,
+            message,
+            uid=None,
+            retry_after=None,
+            **remaining):
+        super(TooManyRequests, self).__init__(
+            status_code,
+            code,
+            message,
+            uid,
+            **remaining)
+        self.retry_after = retry_after
+
+
+class ServerError(ApiError):
+    pass
+
+
+class NetworkError(RuntimeError):
+    retries = 0
+
+
+class TimeoutError(NetworkError):
+    pass
+
+
+class TooManyRedirectsError(NetworkError):
+    pass
+
+
+class ConnectionError(NetworkError):
+    pass
+
+
+class HttpError(NetworkError):
+    pass
+
+
+class RequestError(NetworkError):
+    pass
+
+
+class rewrite_requests_error:
+    # raises the NetworkError matching an exception of the HTTP backend,
+    # mapping holds (exception class, NetworkError class) pairs tried in
+    # order, anything else becomes a RequestError
+
+    mapping = ()
+
+    def __init__(self, mapping=None):
+        if mapping is not None:
+            self.mapping = mapping
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None or issubclass(exc_type, (ApiError, NetworkError)):
+            return
+        for source, exc in self.mapping:
+            if issubclass(exc_type, source):
+                break
+        else:
+            exc = RequestError
+        error = exc(str(exc_value))
+        error.__cause__ = exc_value
+        raise error
@@ -0,0 +1,561 @@
+"""
+An in-process fake of the PrintNode API, for running tests and load
+benchmarks offline.
+
+    with FakeServer(latency=0.01, failure_rate=0.05) as server:
+        server.populate(computers=100, printers_per_computer=5)
+        gateway = Gateway(url=server.url, apikey='any-key')
+
+It serves the endpoints used by this client from in-memory tables and
+accepts any api key unless apikeys is given. Responses can be delayed by
+latency seconds, and failures can be injected either exactly (append
+status codes to failures) or at random (failure_rate).
+"""
+import base64
+import bisect
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+_IDS = r'(\d+(?:,\d+)*)'
+
+
+class FakeServer:
+    """
+    host :str
+    port :int, 0 picks a free port
+    latency :seconds added to every response, or a callable taking the
+    method and path and returning seconds
+    failure_rate :probability of answering with one of failure_statuses
+    failure_statuses :tuple of status codes
+    retry_after :Retry-After sent with injected 429 responses
+    apikeys :set of accepted api keys, None accepts any
+    credentials :dict of accepted account email to password
+    default_limit :page size when a request gives no limit, None for all
+    seed :seed of the random failures and synthetic data
+    """
+
+    def __init__(
+            self,
+            host='127.0.0.1',
+            port=0,
+            latency=0,
+            failure_rate=0,
+            failure_statuses=(429, 500, 503),
+            retry_after=0,
+            apikeys=None,
+            credentials=None,
+            default_limit=None,
+            seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_statuses = tuple(failure_statuses)
+        self.retry_after = retry_after
+        self.apikeys = apikeys
+        self.credentials = dict(credentials or {})
+        self.default_limit = default_limit
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        # status codes answered to the next requests, before any handling
+        self.failures = []
+        # (method, path) of every request received
+        self.requests = []
+        # bodies of the printjobs created
+        self.posted = []
+        self.account = {
+            'id': 1, 'firstname': 'Mr', 'lastname': 'Fake',
+            'email': 'fake@example.com', 'canCreateSubAccounts': False,
+            'creatorEmail': None, 'creatorRef': None, 'childAccounts': [],
+            'credits': None, 'numComputers': 0, 'totalPrints': 0,
+            'versions': [], 'connected': [], 'tags': {},
+            'state': 'active', 'apiKeys': [], 'permissions': ['Unrestricted']}
+        self.computers = _Table()
+        self.printers = _Table()
+        self.printjobs = _Table()
+        self.clients = _Table()
+        # printjob id to its list of states
+        self.states = {}
+        # computer id to its list of scale measurements
+        self.scales = {}
+        self.tags = {}
+        self._idempotency_keys = {}
+        self._routes = [
+            (method, re.compile('^' + pattern + '$'), handler)
+            for method, pattern, handler in self._route_table()]
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        self._server = _ThreadingServer((self.host, self.port), _Handler)
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def add_computer(self, **fields):
+        computer = {
+            'id': None, 'name': None, 'inet': None, 'inet6': None,
+            'hostname': None, 'version': '4.7.1', 'jre': None,
+            'createTimestamp': _timestamp(), 'state': 'connected'}
+        computer.update(fields)
+        with self.lock:
+            computer = self.computers.add(computer)
+            if computer['name'] is None:
+                computer['name'] = 'COMPUTER-{}'.format(computer['id'])
+        return computer
+
+    def add_printer(self, computer_id, **fields):
+        printer = {
+            'id': None, 'computer': self.computers[computer_id],
+            'name': None, 'description': None, 'capabilities': None,
+            'default': False, 'createTimestamp': _timestamp(),
+            'state': 'online'}
+        printer.update(fields)
+        with self.lock:
+            printer = self.printers.add(printer)
+            if printer['name'] is None:
+                printer['name'] = 'PRINTER-{}'.format(printer['id'])
+        return printer
+
+    def add_printjob(self, printer_id, **fields):
+        printjob = {
+            'id': None, 'printer': self.printers[printer_id],
+            'title': 'PrintJob', 'contentType': 'pdf_uri',
+            'source': 'PythonApiClient', 'expireAt': None,
+            'createTimestamp': _timestamp(), 'state': 'new'}
+        printjob.update(fields)
+        with self.lock:
+            printjob = self.printjobs.add(printjob)
+            self.add_state(printjob['id'], printjob['state'])
+        return printjob
+
+    def add_state(self, printjob_id, state, **fields):
+        """appends a state to a printjob and makes it its current state"""
+        record = {
+            'printJobId': printjob_id, 'state': state, 'message': '',
+            'data': None, 'clientVersion': '4.7.1', 'age': 0,
+            'createTimestamp': _timestamp()}
+        record.update(fields)
+        with self.lock:
+            self.states.setdefault(printjob_id, []).append(record)
+            if printjob_id in self.printjobs:
+                self.printjobs[printjob_id]['state'] = state
+        return record
+
+    def add_client(self, **fields):
+        client = {
+            'id': None, 'enabled': True, 'edition': 'printnode',
+            'version': '4.7.1', 'os': 'windows', 'filename': None,
+            'filesize': 0, 'sha1': None, 'releaseTimestamp': _timestamp(),
+            'url': None}
+        client.update(fields)
+        with self.lock:
+            return self.clients.add(client)
+
+    def populate(
+            self,
+            computers=1,
+            printers_per_computer=1,
+            printjobs=0,
+            states_per_printjob=1):
+        """adds a synthetic dataset, printjobs spread over the printers"""
+        progress = ['new', 'sent_to_client', 'queued', 'done']
+        printer_ids = []
+        for _ in range(computers):
+            computer = self.add_computer()
+            for _ in range(printers_per_computer):
+                printer_ids.append(self.add_printer(computer['id'])['id'])
+        for i in range(printjobs):
+            printjob = self.add_printjob(
+                self.random.choice(printer_ids),
+                title='PrintJob {}'.format(i))
+            for state in progress[1:states_per_printjob]:
+                self.add_state(printjob['id'], state)
+
+    def clear(self):
+        with self.lock:
+            for table in (
+                    self.computers,
+                    self.printers,
+                    self.printjobs,
+                    self.clients):
+                table.clear()
+            self.states.clear()
+            self.scales.clear()
+
+    # request handlers, called with the match groups of their route and
+    # returning a (status, body) pair
+
+    def _route_table(self):
+        return [
+            ('GET', r'/whoami', self._get_whoami),
+            ('GET', r'/computers', self._get_computers),
+            ('GET', r'/computers/' + _IDS, self._get_computers),
+            ('GET', r'/computers/' + _IDS + '/printers',
+                self._get_computer_printers),
+            ('GET', r'/printers', self._get_printers),
+            ('GET', r'/printers/' + _IDS, self._get_printers),
+            ('GET', r'/printers/' + _IDS + '/printjobs',
+                self._get_printer_printjobs),
+            ('GET', r'/printjobs', self._get_printjobs),
+            ('GET', r'/printjobs/' + _IDS, self._get_printjobs),
+            ('POST', r'/printjobs', self._post_printjob),
+            ('GET', r'/printjobs/states', self._get_states),
+            ('GET', r'/printjobs/' + _IDS + '/states', self._get_states),
+            ('GET', r'/computer/(\d+)/scales(?:/([^/]+)(?:/(\d+))?)?',
+                self._get_scales),
+            ('GET', r'/account/tag/([^/]+)', self._get_tag),
+            ('POST', r'/account/tag/([^/]+)', self._post_tag),
+            ('DELETE', r'/account/tag/([^/]+)', self._delete_tag),
+            ('GET', r'/download/clients', self._get_clients),
+            ('GET', r'/download/clients/' + _IDS, self._get_clients),
+            ('PATCH', r'/download/clients/' + _IDS, self._patch_clients),
+            ('GET', r'/download/client/([^/]+)', self._get_latest_client),
+            ('GET', r'/test/data/generate', self._generate),
+            ('DELETE', r'/test/data/generate', self._degenerate)]
+
+    def _get_whoami(self, request):
+        return 200, dict(
+            self.account,
+            numComputers=len(self.computers),
+            tags=dict(self.tags))
+
+    def _get_computers(self, request, ids=None):
+        return self._list(request, self.computers, ids)
+
+    def _get_computer_printers(self, request, computer_ids):
+        computer_ids = set(_parse_ids(computer_ids))
+        return 200, self.printers.page(
+            request.params,
+            self.default_limit,
+            lambda p: p['computer']['id'] in computer_ids)
+
+    def _get_printers(self, request, ids=None):
+        return self._list(request, self.printers, ids)
+
+    def _get_printer_printjobs(self, request, printer_ids):
+        printer_ids = set(_parse_ids(printer_ids))
+        return 200, self.printjobs.page(
+            request.params,
+            self.default_limit,
+            lambda pj: pj['printer']['id'] in printer_ids)
+
+    def _get_printjobs(self, request, ids=None):
+        return self._list(request, self.printjobs, ids)
+
+    def _post_printjob(self, request):
+        fields = request.json()
+        key = request.headers.get('X-Idempotency-Key')
+        with self.lock:
+            if key is not None and key in self._idempotency_keys:
+                return 200, self._idempotency_keys[key]
+            if fields.get('printerId') not in self.printers:
+                return _error(400, 'BadRequest', 'printer not found')
+            self.posted.append(fields)
+            printjob = self.add_printjob(
+                fields['printerId'],
+                title=fields.get('title', 'PrintJob'),
+                contentType=fields.get('contentType'),
+                source=fields.get('source'))
+            if key is not None:
+                self._idempotency_keys[key] = printjob['id']
+        return 200, printjob['id']
+
+    def _get_states(self, request, ids=None):
+        with self.lock:
+            if ids is not None:
+                printjob_ids = _parse_ids(ids)
+            else:
+                printjob_ids = _page_ids(
+                    sorted(self.states),
+                    request.params,
+                    self.default_limit)
+            return 200, [
+                list(self.states[i])
+                for i in printjob_ids if i in self.states]
+
+    def _get_scales(self, request, computer_id, dev_name=None, dev_num=None):
+        scales = self.scales.get(int(computer_id), [])
+        if dev_name is not None:
+            scales = [s for s in scales if s['deviceName'] == dev_name]
+        if dev_num is not None:
+            scales = [s for s in scales if s['deviceNum'] == int(dev_num)]
+        return 200, scales
+
+    def _get_tag(self, request, name):
+        if name not in self.tags:
+            return _error(404, 'NotFound', 'no tag {}'.format(name))
+        return 200, self.tags[name]
+
+    def _post_tag(self, request, name):
+        self.tags[name] = request.json()
+        return 200, self.tags[name]
+
+    def _delete_tag(self, request, name):
+        return 200, self.tags.pop(name, None) is not None
+
+    def _get_clients(self, request, ids=None):
+        return self._list(request, self.clients, ids)
+
+    def _patch_clients(self, request, ids):
+        enabled = request.json()['enabled']
+        changed = []
+        with self.lock:
+            for client in self.clients.select(_parse_ids(ids)):
+                client['enabled'] = enabled
+                changed.append(client['id'])
+        return 200, changed
+
+    def _get_latest_client(self, request, os):
+        clients = [
+            c for c in self.clients.values()
+            if c['os'] == os and c['enabled']]
+        if not clients:
+            return _error(404, 'NotFound', 'no client for {}'.format(os))
+        client = max(clients, key=lambda c: c['id'])
+        return 200, dict((k, v) for k, v in client.items() if k != 'id')
+
+    def _generate(self, request):
+        self.populate(computers=2, printers_per_computer=2, printjobs=5)
+        return 200, None
+
+    def _degenerate(self, request):
+        self.clear()
+        return 200, None
+
+    def _list(self, request, table, ids):
+        with self.lock:
+            if ids is None:
+                return 200, table.page(request.params, self.default_limit)
+            return 200, table.select(_parse_ids(ids))
+
+    def handle(self, method, path, headers, body):
+        """
+        Answers one request without going through a socket, returns the
+        status code, a dict of headers and the body as bytes. Used by the
+        HTTP server and usable as the app of transport.InMemoryTransport.
+        """
+        status, body, response_headers = self._respond(
+            _Request(method, path, headers, body))
+        payload = json.dumps(body).encode('utf-8')
+        if method == 'GET' and status == 200:
+            etag = '"{}"'.format(hashlib.sha1(payload).hexdigest())
+            response_headers['ETag'] = etag
+            if headers.get('If-None-Match') == etag:
+                return 304, response_headers, b''
+        response_headers['Content-Type'] = 'application/json'
+        return status, response_headers, payload
+
+    def _authorized(self, request):
+        scheme, _, value = request.headers.get(
+            'Authorization', '').partition(' ')
+        if scheme != 'Basic':
+            return False
+        try:
+            user, _, password = base64.b64decode(
+                value).decode('utf-8').partition(':')
+        except (ValueError, UnicodeDecodeError):
+            return False
+        if 'X-Auth-With-Account-Credentials' in request.headers:
+            return self.credentials.get(user) == password
+        return bool(user) and (self.apikeys is None or user in self.apikeys)
+
+    def _injected_failure(self):
+        with self.lock:
+            if self.failures:
+                return self.failures.pop(0)
+            if (self.failure_rate and
+                    self.random.random() < self.failure_rate):
+                return self.random.choice(self.failure_statuses)
+
+    def _respond(self, request):
+        with self.lock:
+            self.requests.append((request.method, request.path))
+        latency = self.latency
+        if callable(latency):
+            latency = latency(request.method, request.path)
+        if latency:
+            time.sleep(latency)
+
+        headers = {}
+        failure = self._injected_failure()
+        if failure is not None:
+            if failure == 429:
+                headers['Retry-After'] = str(self.retry_after)
+            return failure, {
+                'code': 'Failure',
+                'message': 'injected failure'}, headers
+        if not self._authorized(request):
+            return 401, {
+                'code': 'Unauthorized',
+                'message': 'invalid credentials'}, headers
+        route = request.path.partition('?')[0].rstrip('/') or '/'
+        for method, pattern, handler in self._routes:
+            match = pattern.match(route)
+            if match and method == request.method:
+                status, body = handler(request, *match.groups())
+                return status, body, headers
+        status, body = _error(404, 'NotFound', route)
+        return status, body, headers
+
+
+class _Table(dict):
+    # records by id, with their sorted ids kept for paging
+
+    def __init__(self):
+        dict.__init__(self)
+        self._ids = None
+        self._last_id = 0
+
+    def __setitem__(self, record_id, record):
+        dict.__setitem__(self, record_id, record)
+        self._last_id = max(self._last_id, record_id)
+        self._ids = None
+
+    def __delitem__(self, record_id):
+        dict.__delitem__(self, record_id)
+        self._ids = None
+
+    def clear(self):
+        dict.clear(self)
+        self._ids = None
+
+    def add(self, record):
+        if record.get('id') is None:
+            record['id'] = self._last_id + 1
+        self[record['id']] = record
+        return record
+
+    def ids(self):
+        if self._ids is None:
+            self._ids = sorted(self)
+        return self._ids
+
+    def select(self, ids):
+        return [self[i] for i in sorted(set(ids)) if i in self]
+
+    def page(self, params, default_limit, predicate=None):
+        if predicate is None:
+            return [self[i] for i in _page_ids(
+                self.ids(), params, default_limit)]
+        records = [self[i] for i in self.ids() if predicate(self[i])]
+        ids = [r['id'] for r in records]
+        by_id = dict(zip(ids, records))
+        return [by_id[i] for i in _page_ids(ids, params, default_limit)]
+
+
+def _page_ids(ids, params, default_limit):
+    # the ids of one page of ids (ascending) following the API's
+    # limit/after/dir parameters, dir defaulting to desc
+    limit = params.get('limit')
+    limit = int(limit) if limit is not None else default_limit
+    after = params.get('after')
+    if params.get('dir') == 'asc':
+        start = 0 if after is None else bisect.bisect_right(ids, int(after))
+        stop = len(ids) if limit is None else start + limit
+        return ids[start:stop]
+    stop = len(ids) if after is None else bisect.bisect_left(ids, int(after))
+    start = 0 if limit is None else max(0, stop - limit)
+    return ids[start:stop][::-1]
+
+
+def _parse_ids(ids):
+    return [int(i) for i in ids.split(',')]
+
+
+def _error(status, code, message):
+    return status, {'code': code, 'message': message}
+
+
+def _timestamp():
+    return time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())
+
+
+class _Request:
+
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+        query = path.partition('?')[2]
+        self.params = dict(p.split('=', 1) for p in query.split('&') if p)
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8'))
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, without TCP_NODELAY the
+    # body waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._handle()
+
+    do_POST = do_PATCH = do_DELETE = do_GET
+
+    def _handle(self):
+        status, headers, payload = self.server.fake.handle(
+            self.command,
+            self.path,
+            self.headers,
+            self._read_body())
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b''.join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+
+class _ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
@@ -1,8 +1,5 @@
-import json
-
-import requests
-
 from .auth import Auth, Unauthorized
+from .cache import TTLCache
 from .model import ModelFactory
 from .accounts import Accounts
 from .computers import Computers
@@ -15,16 +12,78 @@ class Gateway:
 
     def __init__(self, **kwargs):
         url = kwargs.pop('url', self.URL)
-        self._auth = Auth(url=url, **kwargs)
-        self._factory = ModelFactory()
+        # resolution_cache: True for a default TTLCache or a TTLCache instance
+        resolution_cache = kwargs.pop('resolution_cache', None)
+        if resolution_cache is True:
+            resolution_cache = TTLCache()
+        elif resolution_cache is False:
+            resolution_cache = None
+        intern_models = kwargs.pop('intern_models', False)
+        # http_cache: True for a default HttpCache or an HttpCache instance
+        http_cache = kwargs.pop('http_cache', None)
+        if http_cache is True:
+            from .httpcache import HttpCache
+            http_cache = HttpCache()
+        elif http_cache is False:
+            http_cache = None
+        self._auth = Auth(url=url, http_cache=http_cache, **kwargs)
+        self._factory = ModelFactory(
+            intern_across_responses=intern_models,
+            http_cache=http_cache)
         self._accounts = Accounts(self._auth, self._factory)
-        self._computers = Computers(self._auth, self._factory)
+        self._computers = Computers(
+            self._auth,
+            self._factory,
+            cache=resolution_cache)
+        self._resolution_cache = resolution_cache
+
+    def close(self):
+        self._auth.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     @property
     def account(self):
         server_account = self._auth.get('whoami')
         return self._factory.create_account(server_account)
 
+    def add_observer(self, observer):
+        self._auth.add_observer(observer)
+
+    def remove_observer(self, observer):
+        self._auth.remove_observer(observer)
+
+    @property
+    def last_retries(self):
+        return self._auth.last_retries
+
+    @property
+    def coalesced_requests(self):
+        return self._auth.coalesced
+
+    @property
+    def resolution_cache(self):
+        return self._resolution_cache
+
+    @property
+    def http_cache(self):
+        return self._auth._http_cache
+
+    def invalidate_resolution_cache(self):
+        self._computers.invalidate_cache()
+
+    @property
+    def save_directory(self):
+        return self._computers.save_directory
+
+    @property
+    def load_directory(self):
+        return self._computers.load_directory
+
     @property
     def computers(self):
         return self._computers.get_computers
@@ -37,6 +96,34 @@ class Gateway:
     def printjobs(self):
         return self._computers.get_printjobs
 
+    @property
+    def computers_many(self):
+        return self._computers.get_computers_many
+
+    @property
+    def printers_many(self):
+        return self._computers.get_printers_many
+
+    @property
+    def printjobs_many(self):
+        return self._computers.get_printjobs_many
+
+    @property
+    def iter_computers(self):
+        return self._computers.iter_computers
+
+    @property
+    def iter_printers(self):
+        return self._computers.iter_printers
+
+    @property
+    def iter_printjobs(self):
+        return self._computers.iter_printjobs
+
+    @property
+    def iter_states(self):
+        return self._computers.iter_states
+
     @property
     def scales(self):
         return self._computers.get_scales
@@ -63,9 +150,21 @@ class Gateway:
 
     def PrintJob(self, *args, **kwargs):
         printjob_id = self._computers.submit_printjob(*args, **kwargs)
+        if kwargs.get('lazy'):
+            # a PrintJobHandle, fetched only when its server state is read
+            return printjob_id
         printjob = self.printjobs(printjob=printjob_id)
         return printjob
 
+    def refresh_printjobs(self, handles):
+        self._computers.refresh_printjobs(handles)
+
+    def submit_printjobs(self, jobs, max_workers=8, ordered=True):
+        return self._computers.submit_printjobs(
+            jobs,
+            max_workers=max_workers,
+            ordered=ordered)
+
     def TestDataGenerate(self):
         self._auth.get('test/data/generate')
 
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .metrics import endpoint_template
+from .util import write_atomic
+
+FORMAT_VERSION = 1
+
+
+class HttpCache:
+    """
+    Cache of GET responses for Auth, revalidated with the ETag and
+    Last-Modified validators the API sends: a cached response is requested
+    again with If-None-Match/If-Modified-Since and a 304 Not Modified answer
+    is served from the cache without downloading or decoding the body.
+
+    A response younger than its TTL is served without any request. ttl is
+    the default and ttls overrides it per endpoint template as reported in
+    RequestEvent.endpoint, e.g. {'/whoami': 300, '/printers/{id}': 30}.
+    With a TTL of 0 every use is revalidated.
+
+    Entries live in an in-memory LRU of maxsize responses and, when a
+    directory is given, in files there too so that they survive restarts.
+    The models built from a cached response are kept alongside it, so a
+    hit also skips the ModelFactory. Responses are shared between callers
+    and must be treated as read-only.
+
+    maxsize :int
+    ttl :seconds
+    ttls :dict of endpoint template to seconds
+    directory :str, path of the on-disk store
+    """
+
+    def __init__(
+            self,
+            maxsize=256,
+            ttl=0,
+            ttls=None,
+            directory=None,
+            timer=time.time):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self.disk = DiskStore(directory) if directory is not None else None
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._by_data = {}
+
+    def lookup(self, url, headers):
+        """the _Lookup of a GET of url with the given request headers"""
+        key = _cache_key(url, headers)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+        if entry is None and self.disk is not None:
+            entry = self.disk.load(key)
+            if entry is not None:
+                self._remember(key, entry)
+        ttl = self.ttls.get(endpoint_template(url), self.ttl)
+        fresh = entry is not None and self._timer() - entry.stored_at < ttl
+        if fresh:
+            with self._lock:
+                self.hits += 1
+        return _Lookup(key, entry, fresh)
+
+    def conditional_headers(self, lookup, headers):
+        headers = dict(headers or {})
+        if lookup.entry is not None:
+            if lookup.entry.etag is not None:
+                headers['If-None-Match'] = lookup.entry.etag
+            if lookup.entry.last_modified is not None:
+                headers['If-Modified-Since'] = lookup.entry.last_modified
+        return headers
+
+    def not_modified(self, lookup):
+        """the cached data of a lookup answered with 304 Not Modified"""
+        with self._lock:
+            self.revalidated += 1
+        lookup.entry.stored_at = self._timer()
+        if self.disk is not None:
+            self.disk.save(lookup.key, lookup.entry)
+        return lookup.entry.data
+
+    def store(self, lookup, url, content, data, headers):
+        with self._lock:
+            self.misses += 1
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        ttl = self.ttls.get(endpoint_template(url), self.ttl)
+        if etag is None and last_modified is None and not ttl:
+            return
+        entry = CacheEntry(
+            url,
+            content,
+            data,
+            etag,
+            last_modified,
+            self._timer())
+        self._remember(lookup.key, entry)
+        if self.disk is not None:
+            self.disk.save(lookup.key, entry)
+
+    def models(self, data, kind, build):
+        """
+        The models built by build from data, built once per cached
+        response. Data that isn't a cached response is simply built.
+        """
+        with self._lock:
+            entry = self._by_data.get(id(data))
+        if entry is None or entry.data is not data:
+            return build()
+        models = entry.models.get(kind)
+        if models is None:
+            models = entry.models[kind] = build()
+        return models
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_data.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, entry):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._by_data.pop(id(old.data), None)
+            self._entries[key] = entry
+            self._by_data[id(entry.data)] = entry
+            while len(self._entries) > self.maxsize:
+                _, evicted = self._entries.popitem(last=False)
+                self._by_data.pop(id(evicted.data), None)
+
+
+class CacheEntry:
+
+    def __init__(self, url, content, data, etag, last_modified, stored_at):
+        self.url = url
+        self.content = content
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+        self.models = {}
+
+
+class DiskStore:
+    """
+    Cached responses as one JSON file per entry in directory, written
+    atomically so that processes can share it.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def load(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                record = json.loads(f.read().decode('utf-8'))
+        except (IOError, OSError, ValueError):
+            return None
+        if record.get('version') != FORMAT_VERSION:
+            return None
+        content = record['content'].encode('utf-8')
+        return CacheEntry(
+            record['url'],
+            content,
+            json.loads(record['content']),
+            record['etag'],
+            record['last_modified'],
+            record['stored_at'])
+
+    def save(self, key, entry):
+        record = {
+            'version': FORMAT_VERSION,
+            'url': entry.url,
+            'etag': entry.etag,
+            'last_modified': entry.last_modified,
+            'stored_at': entry.stored_at,
+            'content': entry.content.decode('utf-8')}
+        write_atomic(self._path(key), json.dumps(record).encode('utf-8'))
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(self.directory, name))
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+
+class _Lookup:
+
+    def __init__(self, key, entry, fresh):
+        self.key = key
+        self.entry = entry
+        self.fresh = fresh
+
+
+def _cache_key(url, headers):
+    # responses differ per account, so the credentials and the child
+    # account headers are part of the key
+    parts = [url] + sorted(
+        '{}: {}'.format(k.lower(), v) for k, v in (headers or {}).items())
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
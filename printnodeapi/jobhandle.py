@@ -0,0 +1,106 @@
+import threading
+import weakref
+
+from printnodeapi.model import PrintJob
+
+
+class PrintJobHandle:
+    """
+    A submitted printjob known by its id and the fields it was submitted
+    with: printer_id, title, content_type, qty and options are available
+    without a request. Any other PrintJob field (state, printer, pages,
+    create_timestamp, ...) is fetched the first time it is read through the
+    shared PrintJobRefresher, which loads every other handle still waiting
+    for its server state in the same request.
+
+    Raises LookupError when the API doesn't know the printjob.
+    """
+
+    def __init__(self, printjob_id, printjob_data, refresher):
+        self.id = printjob_id
+        self.printer_id = printjob_data['printerId']
+        self.title = printjob_data['title']
+        self.content_type = printjob_data['contentType']
+        self.qty = printjob_data.get('qty', 1)
+        self.options = printjob_data.get('options', {})
+        self._refresher = refresher
+        self._printjob = None
+
+    @property
+    def loaded(self):
+        return self._printjob is not None
+
+    @property
+    def printjob(self):
+        """the PrintJob as last fetched, fetched now if never fetched"""
+        if self._printjob is None:
+            self._refresher.load(self)
+        return self._checked_printjob()
+
+    def refresh(self):
+        """fetches the current PrintJob and returns it"""
+        self._refresher.refresh([self])
+        return self._checked_printjob()
+
+    def _checked_printjob(self):
+        if self._printjob is None:
+            raise LookupError('no printjob with ID {}'.format(self.id))
+        return self._printjob
+
+    def __getattr__(self, name):
+        if name in PrintJob._fields:
+            return getattr(self.printjob, name)
+        raise AttributeError(name)
+
+    def __repr__(self):
+        return 'PrintJobHandle(id={!r}, title={!r}, loaded={!r})'.format(
+            self.id,
+            self.title,
+            self.loaded)
+
+
+class PrintJobRefresher:
+    """
+    Fetches the server state of PrintJobHandles, batch_size printjobs per
+    GET /printjobs/{ids} request. Handles not loaded yet are remembered
+    (weakly) so that the first one read pulls in all of them at once.
+
+    auth :Auth
+    factory :ModelFactory
+    batch_size :int
+    """
+
+    def __init__(self, auth, factory, batch_size=100):
+        self._auth = auth
+        self._factory = factory
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._waiting = weakref.WeakValueDictionary()
+
+    def handle(self, printjob_id, printjob_data):
+        handle = PrintJobHandle(printjob_id, printjob_data, self)
+        with self._lock:
+            self._waiting[printjob_id] = handle
+        return handle
+
+    def load(self, handle):
+        """loads handle together with every handle still waiting"""
+        with self._lock:
+            handles = [handle] + [
+                h for h in self._waiting.values()
+                if h is not handle and not h.loaded]
+        self.refresh(handles)
+
+    def refresh(self, handles):
+        handles = list(handles)
+        for i in range(0, len(handles), self.batch_size):
+            batch = handles[i:i+self.batch_size]
+            ids = ','.join(str(h.id) for h in batch)
+            printjobs = self._factory.create_printjobs(
+                self._auth.get('/printjobs/{}'.format(ids)))
+            by_id = {pj.id: pj for pj in printjobs}
+            with self._lock:
+                for h in batch:
+                    h._printjob = by_id.get(h.id, h._printjob)
+                    if self._waiting.get(h.id) is h:
+                        del self._waiting[h.id]
@@ -0,0 +1,173 @@
+import bisect
+import re
+import threading
+import time
+from collections import defaultdict, deque, namedtuple
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+_RequestEvent = namedtuple('RequestEvent', [
+    'method',
+    'endpoint',
+    'url',
+    'status_code',
+    'connect',
+    'ttfb',
+    'download',
+    'elapsed',
+    'request_bytes',
+    'response_bytes',
+    'retries',
+    'exception'])
+
+
+class RequestEvent(_RequestEvent):
+    """
+    What one call of Auth._request did, passed to every observer.
+
+    endpoint is the url path with ids replaced by {id}, so that requests for
+    different records group together. ttfb and download are the seconds the
+    last attempt spent waiting for the response headers and reading the
+    body; download is None for streamed responses. connect is reserved for
+    the time spent opening a connection and is always None for now, as no
+    transport reports it.
+    elapsed covers the whole call including retries and rate limiting.
+    exception is the class of the error raised to the caller, or None.
+    """
+
+    __slots__ = ()
+
+
+_ID_SEGMENT = re.compile(r'/\d+(?:,\d+)*(?=/|$)')
+
+
+def endpoint_template(url):
+    """'/computers/1,2/printers?limit=5' -> '/computers/{id}/printers'"""
+    path = url.split('?', 1)[0]
+    if '://' in path:
+        path = '/' + path.split('://', 1)[1].partition('/')[2]
+    return _ID_SEGMENT.sub('/{id}', path)
+
+
+class MetricsAggregator:
+    """
+    Observer keeping request metrics in memory, grouped by method and
+    endpoint template. Pass it to Auth/Gateway as one of observers and read
+    snapshot() whenever the numbers are needed. It is safe to share between
+    threads.
+
+    Latencies (RequestEvent.elapsed) are counted into cumulative histogram
+    buckets, and the last sample_size of them per endpoint are kept to
+    compute percentiles.
+
+    buckets :ascending upper bounds in seconds
+    sample_size :int
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, buckets=BUCKETS, sample_size=1024):
+        self.buckets = tuple(buckets)
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def __call__(self, event):
+        key = '{} {}'.format(event.method, event.endpoint)
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = _EndpointStats(
+                    len(self.buckets),
+                    self.sample_size)
+            stats.add(event, bisect.bisect_left(self.buckets, event.elapsed))
+
+    def percentile(self, key, q):
+        """q-th percentile (0-100) of the latency of key, eg 'GET /whoami'"""
+        with self._lock:
+            samples = sorted(self._endpoints[key].samples)
+        return _percentile(samples, q)
+
+    def snapshot(self):
+        """
+        Dict from 'METHOD /endpoint/{id}' to the count, errors, retries,
+        status codes, exception names, byte totals and latency histogram
+        and percentiles of its requests.
+        """
+        with self._lock:
+            items = [
+                (key, stats.copy())
+                for key, stats in self._endpoints.items()]
+        return dict((key, self._report(stats)) for key, stats in items)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def _report(self, stats):
+        samples = sorted(stats.samples)
+        cumulative = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), stats.hist):
+            total += count
+            cumulative.append((bound, total))
+        return {
+            'count': stats.count,
+            'errors': stats.errors,
+            'retries': stats.retries,
+            'status_codes': dict(stats.status_codes),
+            'exceptions': dict(stats.exceptions),
+            'request_bytes': stats.request_bytes,
+            'response_bytes': stats.response_bytes,
+            'latency': {
+                'sum': stats.latency_sum,
+                'buckets': cumulative,
+                'p50': _percentile(samples, 50),
+                'p90': _percentile(samples, 90),
+                'p99': _percentile(samples, 99)}}
+
+
+class _EndpointStats:
+
+    def __init__(self, buckets, sample_size):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.status_codes = defaultdict(int)
+        self.exceptions = defaultdict(int)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.latency_sum = 0.0
+        self.hist = [0] * (buckets + 1)
+        self.samples = deque(maxlen=sample_size)
+
+    def add(self, event, bucket):
+        self.count += 1
+        self.retries += event.retries
+        if event.status_code is not None:
+            self.status_codes[event.status_code] += 1
+        if event.exception is not None:
+            self.errors += 1
+            self.exceptions[event.exception.__name__] += 1
+        self.request_bytes += event.request_bytes or 0
+        self.response_bytes += event.response_bytes or 0
+        self.latency_sum += event.elapsed
+        self.hist[bucket] += 1
+        self.samples.append(event.elapsed)
+
+    def copy(self):
+        stats = _EndpointStats(len(self.hist) - 1, self.samples.maxlen)
+        stats.__dict__.update(self.__dict__)
+        stats.status_codes = dict(self.status_codes)
+        stats.exceptions = dict(self.exceptions)
+        stats.hist = list(self.hist)
+        stats.samples = list(self.samples)
+        return stats
+
+
+def _percentile(samples, q):
+    # nearest-rank percentile of sorted samples, None without samples
+    if not samples:
+        return None
+    rank = int(round(q / 100.0 * (len(samples) - 1)))
+    return samples[max(0, min(len(samples) - 1, rank))]
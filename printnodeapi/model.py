@@ -3,6 +3,9 @@ from collections import namedtuple
 
 from .util import camel_to_underscore
 
+_missing = object()
+
+
 def safe_tuple_populate(tuple_class, fields, defaults={}):
     """
     Instantiate a named tuple using *fields in a "safe" way. I.e. extra keys
@@ -31,91 +34,213 @@ def safe_tuple_populate(tuple_class, fields, defaults={}):
     return tuple_class(**fields)
 
 
+class ModelDecoder:
+    """
+    Builds instances of a model from API dicts. Each camelCase key of the
+    API is converted to its field name once and remembered, unknown keys
+    are dropped and missing fields take their default. A default that is
+    callable (e.g. list) is called to create a fresh value per instance.
+
+    model_class :namedtuple/model
+    defaults :dict
+    renames :dict of underscored key to field name, for keys whose
+    camel_to_underscore form isn't the field name
+    """
+
+    def __init__(self, model_class, defaults={}, renames={}):
+        assert issubclass(model_class, Model)
+        self.model_class = model_class
+        self._renames = dict(renames)
+        self._positions = {
+            field: i for i, field in enumerate(model_class._fields)}
+        self._key_positions = {}
+        self._defaults = [None] * len(model_class._fields)
+        self._factories = []
+        for field, default in defaults.items():
+            i = self._positions[field]
+            if callable(default):
+                self._defaults[i] = _missing
+                self._factories.append((i, default))
+            else:
+                self._defaults[i] = default
+
+    def __call__(self, obj_dict):
+        return self.make(self.values(obj_dict))
+
+    def position(self, field):
+        return self._positions[field]
+
+    def values(self, obj_dict):
+        """list of field values taken from obj_dict, in field order"""
+        values = self._defaults[:]
+        key_positions = self._key_positions
+        for key, value in obj_dict.items():
+            try:
+                i = key_positions[key]
+            except KeyError:
+                i = self._learn_key(key)
+            if i is not None:
+                values[i] = value
+        for i, factory in self._factories:
+            if values[i] is _missing:
+                values[i] = factory()
+        return values
+
+    def make(self, values):
+        return tuple.__new__(self.model_class, values)
+
+    def _learn_key(self, key):
+        field = camel_to_underscore(key)
+        field = self._renames.get(field, field)
+        i = self._positions.get(field)
+        self._key_positions[key] = i
+        return i
+
+
 class ModelFactory:
 
+    # most entities remembered when interning across responses
+    MAX_INTERNED = 10000
+
+    def __init__(self, intern_across_responses=False, http_cache=None):
+        # Printers and Computers repeated within a response (e.g. the
+        # printer of each printjob in a list) are built once and shared,
+        # identified by id and checked to have identical content. With
+        # intern_across_responses they are also shared between responses.
+        # With an http_cache, the models of a response served from it are
+        # built only once.
+        self._shared_memo = {} if intern_across_responses else None
+        self._http_cache = http_cache
+
+    def new_memo(self):
+        if self._shared_memo is not None:
+            if len(self._shared_memo) > self.MAX_INTERNED:
+                self._shared_memo.clear()
+            return self._shared_memo
+        return {}
+
     def create_account(self, account_dict):
-        fields = self._underscore_keys(account_dict)
-        fields.setdefault('api_keys', [])
-        fields.setdefault('permissions', [])
-        return safe_tuple_populate(Account, fields)
+        return self._cached(
+            'account',
+            account_dict,
+            lambda: _account_decoder(account_dict))
 
     def create_clients(self, clients_dict):
-        return self._map(self.create_client, clients_dict)
+        return self._cached(
+            'clients',
+            clients_dict,
+            lambda: self._map(self.create_client, clients_dict))
 
     def create_latest_download(self, client_dict):
-        fields = self._underscore_keys(client_dict)
-        return safe_tuple_populate(Download, fields)
+        return _download_decoder(client_dict)
 
     def create_client(self, client_dict):
-        fields = self._underscore_keys(client_dict)
-        return safe_tuple_populate(Client, fields)
+        return _client_decoder(client_dict)
 
     def create_scales(self, scales_dict):
         return self._map(self.create_scale, scales_dict)
 
     def create_scale(self, scale_dict):
-        fields = self._underscore_keys(scale_dict)
-        return safe_tuple_populate(Scale, fields)
+        return _scale_decoder(scale_dict)
 
     def create_computers(self, computers_dict):
-        return self._map(self.create_computer, computers_dict)
-
-    def create_computer(self, computer_dict):
-        fields = self._underscore_keys(computer_dict)
-        del fields['jre']
-        self._rename_field(fields, 'inet_6', 'inet6')
-        return safe_tuple_populate(Computer, fields)
+        return self._cached(
+            'computers',
+            computers_dict,
+            lambda: self._map_interned(self.create_computer, computers_dict))
+
+    def create_computer(self, computer_dict, memo=None, intern=True):
+        # intern=False for records known to be unique, e.g. while iterating
+        # over every computer, so that memo doesn't keep them all alive
+        if not intern:
+            return self._build_computer(computer_dict, memo)
+        return self._interned(
+            Computer,
+            computer_dict,
+            self._build_computer,
+            memo)
+
+    def _build_computer(self, computer_dict, memo):
+        return _computer_decoder(computer_dict)
 
     def create_printers(self, printers_dict):
-        return self._map(self.create_printer, printers_dict)
-
-    def create_printer(self, printer_dict):
-        fields = self._underscore_keys(printer_dict)
-        fields['computer'] = self.create_computer(fields['computer'])
-        if fields['capabilities']:
-            fields['capabilities'] = self.create_capabilities(
-                fields['capabilities'])
-        return safe_tuple_populate(Printer, fields)
+        return self._cached(
+            'printers',
+            printers_dict,
+            lambda: self._map_interned(self.create_printer, printers_dict))
+
+    def create_printer(self, printer_dict, memo=None, intern=True):
+        if not intern:
+            return self._build_printer(printer_dict, memo)
+        return self._interned(
+            Printer,
+            printer_dict,
+            self._build_printer,
+            memo)
+
+    def _build_printer(self, printer_dict, memo):
+        decoder = _printer_decoder
+        values = decoder.values(printer_dict)
+        computer = decoder.position('computer')
+        values[computer] = self.create_computer(values[computer], memo)
+        capabilities = decoder.position('capabilities')
+        if values[capabilities]:
+            values[capabilities] = self.create_capabilities(
+                values[capabilities])
+        return decoder.make(values)
 
     def create_capabilities(self, capabilities_dict):
-        fields = self._underscore_keys(capabilities_dict)
-        return safe_tuple_populate(Capabilities, fields)
+        return _capabilities_decoder(capabilities_dict)
 
     def create_printjobs(self, printjobs_dict):
-        return self._map(self.create_printjob, printjobs_dict)
-
-    def create_printjob(self, printjob_dict):
-        fields = self._underscore_keys(printjob_dict)
-        fields['printer'] = self.create_printer(fields['printer'])
-        fields.setdefault('content', None)
-        fields.setdefault('pages', None)
-        fields.setdefault('qty', 1)
-        fields.setdefault('options', {})
-        return safe_tuple_populate(PrintJob, fields)
+        return self._cached(
+            'printjobs',
+            printjobs_dict,
+            lambda: self._map_interned(self.create_printjob, printjobs_dict))
+
+    def create_printjob(self, printjob_dict, memo=None):
+        decoder = _printjob_decoder
+        values = decoder.values(printjob_dict)
+        printer = decoder.position('printer')
+        values[printer] = self.create_printer(values[printer], memo)
+        return decoder.make(values)
 
     def create_states_map(self, states_dict_list):
         return self._map(self.create_states, states_dict_list)
 
-    def create_states(self, states_dict):
+    def create_states(self, states_dict, memo=None):
         return self._map(self.create_state, states_dict)
 
     def create_state(self, state_dict):
-        fields = self._underscore_keys(state_dict)
-        return safe_tuple_populate(State, fields)
-
-    def _underscore_keys(self, input_dict):
-        return {
-            camel_to_underscore(k): v
-            for k, v in input_dict.items()}
+        return _state_decoder(state_dict)
 
-    def _rename_field(self, obj_dict, old_name, new_name):
-        assert new_name not in obj_dict
-        obj_dict[new_name] = obj_dict[old_name]
-        del obj_dict[old_name]
+    def _cached(self, kind, obj, build):
+        if self._http_cache is None:
+            return build()
+        models = self._http_cache.models(obj, kind, build)
+        # callers may filter or sort the lists they get
+        return list(models) if isinstance(models, list) else models
 
     def _map(self, f, iter):
         return list(map(f, iter))
 
+    def _map_interned(self, f, iter):
+        memo = self.new_memo()
+        return [f(x, memo) for x in iter]
+
+    def _interned(self, model_class, obj_dict, build, memo):
+        if memo is None:
+            memo = self._shared_memo
+        key = (model_class, obj_dict.get('id'))
+        if memo is None or key[1] is None:
+            return build(obj_dict, memo)
+        entry = memo.get(key)
+        if entry is not None and entry[0] == obj_dict:
+            return entry[1]
+        model = build(obj_dict, memo)
+        memo[key] = (obj_dict, model)
+        return model
+
 
 class Model:
     pass
@@ -277,3 +402,18 @@ Capabilities = namedtuple('Capabilities', [
 
 class Capabilities(Capabilities, Model):
     pass
+
+
+_account_decoder = ModelDecoder(
+    Account,
+    defaults={'api_keys': list, 'permissions': list})
+_client_decoder = ModelDecoder(Client)
+_download_decoder = ModelDecoder(Download)
+_scale_decoder = ModelDecoder(Scale)
+_computer_decoder = ModelDecoder(Computer, renames={'inet_6': 'inet6'})
+_printer_decoder = ModelDecoder(Printer)
+_capabilities_decoder = ModelDecoder(Capabilities)
+_printjob_decoder = ModelDecoder(
+    PrintJob,
+    defaults={'qty': 1, 'options': dict})
+_state_decoder = ModelDecoder(State)
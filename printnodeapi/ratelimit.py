@@ -0,0 +1,109 @@
+import threading
+import time
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the requests made through one or more Auth
+    instances to rate requests per second, with bursts of up to burst
+    requests. It is safe to share between threads.
+
+    When the API answers 429 Too Many Requests the limiter stops all
+    requests for the Retry-After period (or one request interval when the
+    server gives none) and multiplies its rate by backoff_factor. Each
+    successful request then raises the rate by recovery * rate until the
+    configured rate is reached again. Throttled requests are retried up to
+    max_retries times before TooManyRequests is raised to the caller.
+
+    rate :requests per second
+    burst :int, defaults to one second worth of requests
+    backoff_factor :float between 0 and 1
+    recovery :float, fraction of rate regained per successful request
+    min_rate :lowest requests per second backing off can reach
+    max_retries :int
+    """
+
+    def __init__(
+            self,
+            rate,
+            burst=None,
+            backoff_factor=0.5,
+            recovery=0.05,
+            min_rate=None,
+            max_retries=3,
+            timer=_monotonic,
+            sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = float(rate)
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.backoff_factor = backoff_factor
+        self.recovery = recovery
+        self.min_rate = min_rate if min_rate is not None else self.rate / 100
+        self.max_retries = max_retries
+        self._timer = timer
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._current_rate = self.rate
+        self._tat = timer()
+        self._blocked_until = 0
+
+    @property
+    def current_rate(self):
+        return self._current_rate
+
+    def reserve(self):
+        """claims the next request slot, returns seconds to wait for it"""
+        with self._lock:
+            now = self._timer()
+            interval = 1.0 / self._current_rate
+            tolerance = (self.burst - 1) * interval
+            tat = max(self._tat, now)
+            allow_at = max(tat - tolerance, self._blocked_until)
+            self._tat = max(tat, allow_at) + interval
+            return max(0, allow_at - now)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+
+    def throttled(self, retry_after=None):
+        with self._lock:
+            now = self._timer()
+            self._current_rate = max(
+                self.min_rate,
+                self._current_rate * self.backoff_factor)
+            if retry_after is None:
+                retry_after = 1.0 / self._current_rate
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            self._tat = max(self._tat, self._blocked_until)
+
+    def succeeded(self):
+        if self._current_rate < self.rate:
+            with self._lock:
+                self._current_rate = min(
+                    self.rate,
+                    self._current_rate + self.rate * self.recovery)
+
+
+def parse_retry_after(value):
+    """
+    Seconds to wait according to a Retry-After header, which is either a
+    number of seconds or an HTTP date. None if absent or unparseable.
+    """
+
+    if not value:
+        return None
+    try:
+        return max(0, float(value))
+    except ValueError:
+        pass
+    # HTTP dates are rare here, email is only imported to parse one
+    from email.utils import mktime_tz, parsedate_tz
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0, mktime_tz(date) - time.time())
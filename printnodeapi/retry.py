@@ -0,0 +1,77 @@
+import random
+import time
+
+from .auth import ConnectionError, ServerError, TimeoutError
+
+IDEMPOTENCY_HEADER = 'X-Idempotency-Key'
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed request made through Auth is tried again and
+    how long to wait before doing so.
+
+    Only requests whose method is in methods (GET and DELETE by default) or
+    which carry an X-Idempotency-Key header are ever retried, so that a
+    retried submission can't print twice. Which errors are retried is set
+    by rules, a dict from exception class to either True (retry up to
+    max_attempts) or an int (a lower attempt limit for that class); the
+    most specific class of a raised error decides. The n-th retry waits a
+    random time up to min(max_backoff, backoff * 2 ** (n - 1)) seconds, or
+    exactly that long when jitter is False.
+
+    max_attempts :int, attempts including the first one
+    backoff :seconds
+    max_backoff :seconds
+    jitter :bool
+    rules :dict
+    methods :iterable of str
+    """
+
+    DEFAULT_RULES = {
+        ServerError: True,
+        ConnectionError: True,
+        TimeoutError: True}
+
+    def __init__(
+            self,
+            max_attempts=3,
+            backoff=0.5,
+            max_backoff=30,
+            jitter=True,
+            rules=None,
+            methods=('GET', 'DELETE'),
+            sleep=time.sleep):
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.rules = dict(self.DEFAULT_RULES if rules is None else rules)
+        self.methods = frozenset(m.upper() for m in methods)
+        self.sleep = sleep
+
+    def allows(self, method, request_headers):
+        return (
+            method in self.methods or
+            IDEMPOTENCY_HEADER in (request_headers or {}))
+
+    def should_retry(self, exc, attempt):
+        """whether to make attempt number attempt + 1 after exc"""
+        for exc_class in type(exc).__mro__:
+            if exc_class in self.rules:
+                rule = self.rules[exc_class]
+                if rule is True:
+                    return attempt < self.max_attempts
+                elif rule is False:
+                    return False
+                return attempt < min(rule, self.max_attempts)
+        return False
+
+    def delay(self, retry):
+        """seconds to wait before the retry-th retry"""
+        delay = min(self.max_backoff, self.backoff * 2 ** (retry - 1))
+        if self.jitter:
+            return random.uniform(0, delay)
+        return delay
@@ -0,0 +1,77 @@
+import marshal
+import struct
+import sys
+import time
+
+from .util import write_atomic
+
+MAGIC = b'PNDIR'
+FORMAT_VERSION = 1
+
+# magic, format version, marshal version, python major and minor, saved_at
+_HEADER = struct.Struct('<5sHHBBd')
+
+
+class DirectorySnapshot:
+    """
+    The computers and printers of an account, capabilities included, kept
+    as the records the API returned them in. Saved to a file with marshal
+    it loads in a few milliseconds, so that a new worker can fill its
+    resolution cache from it instead of downloading the directory again.
+
+    Files are only read back by the Python version that wrote them, as the
+    marshal format may change between versions.
+
+    computers :list of dict
+    printers :list of dict
+    saved_at :time.time() of the download
+    """
+
+    def __init__(self, computers, printers, saved_at=None):
+        self.computers = computers
+        self.printers = printers
+        self.saved_at = time.time() if saved_at is None else saved_at
+
+    @property
+    def age(self):
+        return time.time() - self.saved_at
+
+    def save(self, path):
+        header = _HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            marshal.version,
+            sys.version_info[0],
+            sys.version_info[1],
+            self.saved_at)
+        write_atomic(
+            path,
+            header + marshal.dumps((self.computers, self.printers)))
+
+    @classmethod
+    def load(cls, path):
+        """
+        the snapshot saved at path, None if there is none or it is corrupt
+        or was written by another version
+        """
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except (IOError, OSError):
+            return None
+        if len(data) < _HEADER.size:
+            return None
+        magic, version, marshal_version, major, minor, saved_at = \
+            _HEADER.unpack_from(data)
+        if (magic, version, marshal_version, major, minor) != (
+                MAGIC,
+                FORMAT_VERSION,
+                marshal.version,
+                sys.version_info[0],
+                sys.version_info[1]):
+            return None
+        try:
+            computers, printers = marshal.loads(data[_HEADER.size:])
+        except (EOFError, ValueError, TypeError):
+            return None
+        return cls(computers, printers, saved_at)
@@ -0,0 +1,90 @@
+import codecs
+import json
+
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_array(chunks, encoding='utf-8'):
+    """
+    Yield the elements of a JSON array read incrementally from an iterable
+    of byte chunks, holding no more than the current element and one chunk
+    in memory. Raises ValueError if the input isn't a JSON array.
+
+    chunks :iterable of bytes
+    encoding :str
+    """
+
+    decoder = json.JSONDecoder()
+    reader = _ChunkReader(chunks, encoding)
+
+    if reader.next_char() != '[':
+        raise ValueError('expected a JSON array')
+    if reader.peek_char() == ']':
+        reader.pos += 1
+        return
+    while True:
+        yield reader.decode(decoder)
+        separator = reader.next_char()
+        if separator == ']':
+            return
+        elif separator != ',':
+            raise ValueError(
+                'expected "," or "]" in JSON array, got {!r}'.format(
+                    separator))
+
+
+class _ChunkReader:
+
+    def __init__(self, chunks, encoding):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._exhausted = False
+        self.buffer = ''
+        self.pos = 0
+
+    def peek_char(self):
+        while True:
+            while self.pos < len(self.buffer):
+                if self.buffer[self.pos] not in _WHITESPACE:
+                    return self.buffer[self.pos]
+                self.pos += 1
+            if not self._read():
+                raise ValueError('unexpected end of JSON array')
+
+    def next_char(self):
+        char = self.peek_char()
+        self.pos += 1
+        return char
+
+    def decode(self, decoder):
+        self.peek_char()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if not self._read():
+                    raise
+                continue
+            # a number or literal ending with the buffer may be cut short
+            if end == len(self.buffer) and self._read():
+                continue
+            self.pos = end
+            return value
+
+    def _read(self):
+        # append the next chunk, dropping what has already been consumed
+        if self._exhausted:
+            return False
+        text = ''
+        while not text:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._exhausted = True
+                text = self._decoder.decode(b'', final=True)
+                break
+            text = self._decoder.decode(chunk)
+        if not text:
+            return False
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
@@ -0,0 +1,334 @@
+"""
+HTTP backends that Auth sends its requests through.
+
+A transport has a request(method, url, headers, data, stream) method
+returning a Response, a close() method and an errors attribute: the
+(exception class, NetworkError subclass) pairs, most specific first, that
+rewrite_requests_error uses to map its exceptions. data is None, a str or
+bytes body, or an iterable of bytes with a len attribute (upload.JsonBody).
+"""
+import json
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .errors import (
+    ConnectionError,
+    HttpError,
+    RequestError,
+    TimeoutError,
+    TooManyRedirectsError)
+
+_perf_counter = getattr(time, 'perf_counter', time.time)
+
+
+class Response:
+    """
+    status_code :int
+    headers :case insensitive mapping
+    elapsed :seconds until the response headers arrived, None if unknown
+    """
+
+    def __init__(
+            self,
+            status_code,
+            headers,
+            content=None,
+            chunks=None,
+            close=None,
+            elapsed=None):
+        # :param content - the body when it has been read already
+        # :param chunks  - callable taking a chunk size and returning an
+        # iterator over the body, when it hasn't
+        # :param close   - callable releasing the connection
+        self.status_code = status_code
+        self.headers = headers
+        self.elapsed = elapsed
+        self._content = content
+        self._chunks = chunks
+        self._close = close
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = b''.join(self._chunks(64 * 1024))
+        return self._content
+
+    def iter_content(self, chunk_size):
+        if self._content is not None:
+            return (
+                self._content[i:i+chunk_size]
+                for i in range(0, len(self._content), chunk_size))
+        return self._chunks(chunk_size)
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+
+
+def _keep_authorization(request):
+    return request
+
+
+class RequestsTransport:
+    """
+    Sends requests with a pooled requests.Session, the default transport.
+
+    pool_connections :number of per-host pools to keep
+    pool_maxsize :max connections kept open to one host
+    pool_block :wait for a free connection instead of opening a throwaway one
+    keep_alive :reuse connections between requests
+    verify :path of a CA bundle, or False to skip certificate checks
+    """
+
+    errors = (
+        (requests.Timeout, TimeoutError),
+        (requests.TooManyRedirects, TooManyRedirectsError),
+        (requests.HTTPError, HttpError),
+        (requests.ConnectionError, ConnectionError))
+
+    def __init__(
+            self,
+            pool_connections=10,
+            pool_maxsize=10,
+            pool_block=False,
+            keep_alive=True,
+            verify=None):
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+        if verify is not None:
+            self.session.verify = verify
+        # Auth sets the Authorization header itself. Without a session auth,
+        # requests would replace it with the entry of a ~/.netrc for the api
+        # host. trust_env=False would also drop the proxy environment.
+        self.session.auth = _keep_authorization
+
+    def request(self, method, url, headers=None, data=None, stream=False):
+        response = self.session.request(
+            method,
+            url=url,
+            headers=headers,
+            data=data,
+            stream=stream)
+        return Response(
+            response.status_code,
+            response.headers,
+            content=None if stream else response.content,
+            chunks=response.iter_content,
+            close=response.close,
+            elapsed=response.elapsed.total_seconds())
+
+    def close(self):
+        self.session.close()
+
+
+class Urllib3Transport:
+    """
+    Sends requests straight through a urllib3.PoolManager, skipping the
+    per-request work requests does on top of it. Takes the arguments of
+    RequestsTransport.
+    """
+
+    def __init__(
+            self,
+            pool_connections=10,
+            pool_maxsize=10,
+            pool_block=False,
+            keep_alive=True,
+            verify=None):
+        import urllib3
+        import urllib3.exceptions as e
+        self.errors = (
+            (e.NewConnectionError, ConnectionError),
+            (e.TimeoutError, TimeoutError),
+            (e.ProtocolError, ConnectionError),
+            (e.SSLError, ConnectionError),
+            (e.MaxRetryError, ConnectionError),
+            (e.HTTPError, RequestError))
+        pool_args = {}
+        if verify is False:
+            pool_args['cert_reqs'] = 'CERT_NONE'
+        elif verify is not None:
+            pool_args['ca_certs'] = verify
+        self._keep_alive = keep_alive
+        self.pool = urllib3.PoolManager(
+            num_pools=pool_connections,
+            maxsize=pool_maxsize,
+            block=pool_block,
+            **pool_args)
+
+    def request(self, method, url, headers=None, data=None, stream=False):
+        headers = dict(headers or {})
+        if not self._keep_alive:
+            headers['Connection'] = 'close'
+        body = data
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        elif body is not None and not isinstance(body, bytes):
+            if getattr(body, 'len', None) is not None:
+                headers['Content-Length'] = str(body.len)
+            body = iter(body)
+        start = _perf_counter()
+        response = self.pool.urlopen(
+            method,
+            url,
+            body=body,
+            headers=headers,
+            retries=False,
+            preload_content=False,
+            chunked=body is not None and 'Content-Length' not in headers and
+            not isinstance(body, bytes))
+        elapsed = _perf_counter() - start
+
+        def chunks(chunk_size):
+            # a chunk_size read can come back short, stream() keeps going
+            return response.stream(chunk_size)
+
+        def close():
+            response.release_conn()
+
+        content = None
+        if not stream:
+            try:
+                content = response.read()
+            finally:
+                close()
+        return Response(
+            response.status,
+            response.headers,
+            content=content,
+            chunks=chunks,
+            close=close,
+            elapsed=elapsed)
+
+    def close(self):
+        self.pool.clear()
+
+
+class HttpxTransport:
+    """
+    Sends requests with an httpx.Client. With http2 (which needs the h2
+    package) requests made concurrently from many threads are multiplexed
+    over a single connection per host instead of one connection each.
+
+    http2 :bool
+    pool_maxsize :max connections kept open, in total
+    keep_alive :reuse connections between requests
+    verify :path of a CA bundle, or False to skip certificate checks
+    timeout :seconds, None waits forever like requests does
+    """
+
+    def __init__(
+            self,
+            http2=True,
+            pool_maxsize=10,
+            keep_alive=True,
+            verify=None,
+            timeout=None):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError(
+                'HttpxTransport requires httpx, install it with '
+                '"pip install PrintNodeApi[http2]"')
+        self.errors = (
+            (httpx.TimeoutException, TimeoutError),
+            (httpx.TooManyRedirects, TooManyRedirectsError),
+            (httpx.NetworkError, ConnectionError),
+            (httpx.ProtocolError, ConnectionError),
+            (httpx.HTTPStatusError, HttpError),
+            (httpx.HTTPError, RequestError))
+        self.client = httpx.Client(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=pool_maxsize,
+                max_keepalive_connections=pool_maxsize if keep_alive else 0),
+            verify=True if verify is None else verify,
+            timeout=timeout)
+
+    def request(self, method, url, headers=None, data=None, stream=False):
+        headers = dict(headers or {})
+        content = data
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        elif content is not None and not isinstance(content, bytes):
+            if getattr(content, 'len', None) is not None:
+                headers['Content-Length'] = str(content.len)
+            content = iter(content)
+        request = self.client.build_request(
+            method,
+            url,
+            headers=headers,
+            content=content)
+        start = _perf_counter()
+        response = self.client.send(request, stream=True)
+        elapsed = _perf_counter() - start
+        if not stream:
+            try:
+                response.read()
+            finally:
+                response.close()
+            body = response.content
+        else:
+            body = None
+        return Response(
+            response.status_code,
+            response.headers,
+            content=body,
+            chunks=lambda chunk_size: response.iter_bytes(chunk_size),
+            close=response.close,
+            elapsed=elapsed)
+
+    def close(self):
+        self.client.close()
+
+
+class InMemoryTransport:
+    """
+    Answers requests by calling app instead of using the network, for
+    tests. app is called with the method, the path and query of the url,
+    the headers and the body as bytes, and returns the status code, a dict
+    of headers and the body as bytes. FakeServer.handle is such an app:
+
+        transport = InMemoryTransport(FakeServer().handle)
+    """
+
+    errors = ()
+
+    def __init__(self, app):
+        self.app = app
+
+    def request(self, method, url, headers=None, data=None, stream=False):
+        if data is None:
+            body = b''
+        elif isinstance(data, bytes):
+            body = data
+        elif isinstance(data, str):
+            body = data.encode('utf-8')
+        else:
+            body = b''.join(data)
+        path = '/' + url.split('://', 1)[-1].partition('/')[2]
+        status_code, response_headers, content = self.app(
+            method,
+            path,
+            CaseInsensitiveDict(headers or {}),
+            body)
+        return Response(
+            status_code,
+            CaseInsensitiveDict(response_headers),
+            content=content,
+            elapsed=0.0)
+
+    def close(self):
+        pass
@@ -0,0 +1,141 @@
+import base64
+import io
+import json
+import os
+
+# os.PathLike exists from Python 3.6
+_PathLike = getattr(os, 'PathLike', None)
+
+
+class Base64File:
+    """
+    The base64 encoded content of a file, read and encoded chunk_size
+    bytes at a time while the request is sent instead of being loaded
+    whole. source is a path or a binary file object; a file object that
+    can't seek can only be sent once (replayable is False) and has no known
+    length.
+
+    source :str, os.PathLike or file object
+    chunk_size :int, multiple of 3 so chunks encode without padding
+    """
+
+    CHUNK_SIZE = 48 * 1024
+
+    def __init__(self, source, chunk_size=CHUNK_SIZE):
+        if chunk_size % 3 != 0:
+            raise ValueError('chunk_size must be a multiple of 3')
+        if _PathLike is not None and isinstance(source, _PathLike):
+            source = os.fspath(source)
+        self._source = source
+        self._chunk_size = chunk_size
+        self._start = None
+        self._size = None
+        self._consumed = False
+        if isinstance(source, str):
+            self._size = os.path.getsize(source)
+        elif self._seekable(source):
+            self._start = source.tell()
+            source.seek(0, io.SEEK_END)
+            self._size = source.tell() - self._start
+            source.seek(self._start)
+
+    @property
+    def len(self):
+        """length of the encoded content, None if unknown"""
+        if self._size is None:
+            return None
+        return 4 * ((self._size + 2) // 3)
+
+    @property
+    def replayable(self):
+        """whether the content can be read again to resend it"""
+        return isinstance(self._source, str) or self._start is not None
+
+    def __iter__(self):
+        if isinstance(self._source, str):
+            with open(self._source, 'rb') as f:
+                for chunk in self._encode(f):
+                    yield chunk
+        else:
+            if self._start is not None:
+                self._source.seek(self._start)
+            elif self._consumed:
+                # what was read is gone, sending again would post an
+                # empty or truncated document
+                raise ValueError(
+                    'the content of a file object that can\'t seek can '
+                    'only be sent once')
+            self._consumed = True
+            for chunk in self._encode(self._source):
+                yield chunk
+
+    def _encode(self, f):
+        while True:
+            chunk = f.read(self._chunk_size)
+            if not chunk:
+                return
+            # a short read isn't necessarily the end of the file, keep
+            # chunks a multiple of 3 bytes so no padding is emitted early
+            while len(chunk) % 3 != 0:
+                more = f.read(3 - len(chunk) % 3)
+                if not more:
+                    break
+                chunk += more
+            yield base64.b64encode(chunk)
+
+    def _seekable(self, f):
+        try:
+            return f.seekable()
+        except AttributeError:
+            return hasattr(f, 'seek') and hasattr(f, 'tell')
+
+
+class JsonBody:
+    """
+    Request body serializing fields as a JSON object, streaming the
+    content of any Base64File value as a JSON string. It can be iterated
+    again to resend it as long as its files can, see replayable.
+
+    fields :dict
+    """
+
+    def __init__(self, fields):
+        self._parts = []
+        text = []
+        for i, (key, value) in enumerate(fields.items()):
+            text.append('{' if i == 0 else ', ')
+            text.append(json.dumps(key) + ': ')
+            if isinstance(value, Base64File):
+                text.append('"')
+                self._parts.append(''.join(text).encode('utf-8'))
+                self._parts.append(value)
+                text = ['"']
+            else:
+                text.append(json.dumps(value))
+        text.append('}' if fields else '{}')
+        self._parts.append(''.join(text).encode('utf-8'))
+
+    @property
+    def len(self):
+        """length of the body in bytes, None if unknown"""
+        total = 0
+        for part in self._parts:
+            length = part.len if isinstance(part, Base64File) else len(part)
+            if length is None:
+                return None
+            total += length
+        return total
+
+    @property
+    def replayable(self):
+        return all(
+            part.replayable for part in self._parts
+            if isinstance(part, Base64File))
+
+    def __iter__(self):
+        for part in self._parts:
+            if isinstance(part, Base64File):
+                for chunk in part:
+                    yield chunk
+            else:
+                yield part
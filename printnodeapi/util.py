@@ -1,5 +1,10 @@
+import collections
+import itertools
+import os
 import re
 
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 def camel_to_underscore(text):
     letters = list(text.strip())
     indexes = [i for i,
@@ -9,3 +14,67 @@ def camel_to_underscore(text):
         if i != 0:
             letters.insert(i, '_')
     return ''.join(letters)
+
+
+def imap_bounded(f, iterable, max_workers, ordered=True):
+    """
+    Lazily map f over iterable on a pool of max_workers threads, keeping at
+    most 2 * max_workers items in flight so that large iterables are never
+    queued up front. Results are yielded in input order unless ordered is
+    False, in which case they are yielded as they complete.
+
+    f :callable taking the unpacked items of iterable
+    iterable :iterable of argument tuples
+    max_workers :int
+    ordered :bool
+    """
+
+    window = 2 * max_workers
+    items = iter(iterable)
+    pending = collections.deque() if ordered else set()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def fill():
+        for args in itertools.islice(items, window - len(pending)):
+            future = executor.submit(f, *args)
+            if ordered:
+                pending.append(future)
+            else:
+                pending.add(future)
+
+    try:
+        fill()
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                pending.difference_update(done)
+            for future in done:
+                yield future.result()
+            fill()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+_replace = getattr(os, 'replace', os.rename)
+
+
+def write_atomic(path, data):
+    """
+    Writes the bytes data to path through a temporary file renamed over it,
+    so that readers never see a partly written file.
+    """
+    import tempfile
+    fd, tmp = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)),
+        suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        _replace(tmp, path)
+    except Exception:
+        os.remove(tmp)
+        raise
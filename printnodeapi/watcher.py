@@ -0,0 +1,185 @@
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+class JobWatcher:
+    """
+    Follows many printjobs until each reaches a terminal state, polling
+    their states in batches of batch_size jobs per request rather than one
+    request per job.
+
+    watch() returns a Future resolved with the terminal State of the job.
+    Polling runs on a background thread started by the first watch() and
+    stopped by close(); with background=False nothing polls until poll() is
+    called. The poll interval halves (down to min_interval)
+    after a poll that saw new states and grows by half (up to max_interval)
+    after one that saw none, so it follows the rate at which jobs progress.
+
+    A job still pending timeout seconds after watch() is given up on and its
+    Future fails with concurrent.futures.TimeoutError. close() cancels the
+    Futures of the jobs still pending.
+
+    gateway :Gateway
+    batch_size :int
+    min_interval :seconds
+    max_interval :seconds
+    terminal_states :set of State.state values that end a job
+    background :bool
+    timeout :seconds or None to wait for every job indefinitely
+    """
+
+    TERMINAL_STATES = frozenset([
+        'done',
+        'error',
+        'expired',
+        'deleted',
+        'cancelled'])
+
+    def __init__(
+            self,
+            gateway,
+            batch_size=100,
+            min_interval=0.5,
+            max_interval=30,
+            terminal_states=TERMINAL_STATES,
+            background=True,
+            timeout=None):
+        self._gateway = gateway
+        self.batch_size = batch_size
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.terminal_states = frozenset(terminal_states)
+        self.background = background
+        self.timeout = timeout
+        self.interval = min_interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def watch(self, printjob_id, callback=None):
+        """
+        Starts following printjob_id, returns a Future resolved with its
+        terminal State. callback, if given, is called with that State.
+        """
+        with self._lock:
+            if self._stopped.is_set():
+                raise RuntimeError('the watcher is closed')
+            if not self._jobs:
+                # the poller sleeps while there is nothing to watch
+                self.interval = self.min_interval
+                self._wakeup.set()
+            job = self._jobs.get(printjob_id)
+            if job is None:
+                deadline = None
+                if self.timeout is not None:
+                    deadline = _monotonic() + self.timeout
+                job = self._jobs[printjob_id] = _WatchedJob(deadline)
+            if (self.background and self._thread is None and
+                    not self._stopped.is_set()):
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+        if callback is not None:
+            job.future.add_done_callback(
+                lambda f: f.cancelled() or f.exception() is not None or
+                callback(f.result()))
+        return job.future
+
+    @property
+    def pending(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def poll(self):
+        """polls every watched job once, returns the number of new states"""
+        now = _monotonic()
+        expired = []
+        with self._lock:
+            for printjob_id, job in list(self._jobs.items()):
+                if job.future.cancelled():
+                    del self._jobs[printjob_id]
+                elif job.deadline is not None and now >= job.deadline:
+                    del self._jobs[printjob_id]
+                    expired.append((printjob_id, job))
+            ids = list(self._jobs)
+        for printjob_id, job in expired:
+            if job.future.cancelled():
+                continue
+            job.future.set_exception(TimeoutError(
+                'printjob {} reached no terminal state within {}s'.format(
+                    printjob_id,
+                    self.timeout)))
+        new_states = 0
+        for i in range(0, len(ids), self.batch_size):
+            batch = ','.join(map(str, ids[i:i+self.batch_size]))
+            for states in self._gateway.states(batch):
+                new_states += self._update(states)
+        return new_states
+
+    def close(self):
+        """stops polling and cancels the Futures of jobs still pending"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+        for job in jobs:
+            job.future.cancel()
+
+    def _update(self, states):
+        if not states:
+            return 0
+        printjob_id = states[0].print_job_id
+        with self._lock:
+            job = self._jobs.get(printjob_id)
+            if job is None:
+                return 0
+            new = states[job.seen:]
+            job.seen = len(states)
+            terminal = [s for s in new if s.state in self.terminal_states]
+            if terminal:
+                del self._jobs[printjob_id]
+        if terminal and not job.future.cancelled():
+            job.future.set_result(terminal[-1])
+        return len(new)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if not self.pending:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            try:
+                if self.poll():
+                    self.interval = max(self.min_interval, self.interval / 2)
+                else:
+                    self.interval = min(
+                        self.max_interval,
+                        self.interval * 1.5)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                self.interval = self.max_interval
+            self._stopped.wait(self.interval)
+
+
+class _WatchedJob:
+
+    def __init__(self, deadline=None):
+        self.future = Future()
+        self.seen = 0
+        self.deadline = deadline
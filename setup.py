@@ -8,4 +8,11 @@ setup(
     author='printnode',
     author_email='support@printnode.com',
     packages=['printnodeapi'],
-    install_requires=['requests','future'])
+    install_requires=[
+        'requests',
+        'future; python_version < "3"',
+        'futures; python_version < "3"'],
+    extras_require={
+        'async': ['aiohttp'],
+        'http2': ['httpx[http2]'],
+        'fastjson': ['orjson']})
@@ -0,0 +1,27 @@
+"""The FakeServer set up with the records the offline tests expect."""
+import pytest
+
+from printnodeapi.fakeserver import FakeServer
+
+COMPUTER = {
+    'id': 11, 'name': 'TEST-COMPUTER', 'inet': None, 'inet6': None,
+    'hostname': None, 'version': None, 'jre': None,
+    'createTimestamp': '2015-07-10T15:04:40.253Z', 'state': 'connected'}
+PRINTER = {
+    'id': 22, 'computer': COMPUTER, 'name': 'TEST-PRINTER',
+    'description': 'description', 'capabilities': None, 'default': True,
+    'createTimestamp': '2015-07-10T15:04:40.253Z', 'state': 'online'}
+# not served by stand_in, test_model and test_computers compare with it
+PRINTJOB = {
+    'id': 33, 'printer': PRINTER, 'title': 'PrintJob',
+    'contentType': 'pdf_uri', 'source': 'PythonApiClient',
+    'expireAt': None, 'createTimestamp': '2015-07-10T15:04:40.253Z',
+    'state': 'new'}
+
+
+@pytest.fixture
+def stand_in():
+    with FakeServer(apikeys={'key'}) as server:
+        server.add_computer(**COMPUTER)
+        server.add_printer(11, **dict(PRINTER, computer=COMPUTER))
+        yield server
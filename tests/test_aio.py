@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from printnodeapi import AsyncGateway, Unauthorized
+from printnodeapi.model import Account, Printer
+from standin import stand_in
+
+pytest.importorskip('aiohttp')
+
+
+def test_async_gateway_lookups(stand_in):
+    async def run():
+        async with AsyncGateway(
+                url=stand_in.url,
+                apikey='key') as gateway:
+            account = await gateway.account
+            printers = await gateway.printers(printer='TEST-PRINTER')
+            return account, printers
+
+    account, printers = asyncio.run(run())
+    assert isinstance(account, Account)
+    assert 'Mr' == account.firstname
+    assert [22] == [p.id for p in printers]
+    assert isinstance(printers[0], Printer)
+
+
+def test_async_gateway_print_job(stand_in):
+    async def run():
+        async with AsyncGateway(
+                url=stand_in.url,
+                apikey='key') as gateway:
+            return await gateway.PrintJob(printer=22, uri='a.pdf')
+
+    printjob = asyncio.run(run())
+    assert printjob.id in stand_in.printjobs
+    assert 22 == stand_in.posted[0]['printerId']
+
+
+def test_async_gateway_runs_calls_concurrently(stand_in):
+    async def run():
+        async with AsyncGateway(
+                url=stand_in.url,
+                apikey='key') as gateway:
+            return await asyncio.gather(
+                *[gateway.printers(printer=22) for _ in range(50)])
+
+    printers = asyncio.run(run())
+    assert 50 == len(printers)
+
+
+def test_async_gateway_raises_api_errors(stand_in):
+    async def run():
+        async with AsyncGateway(
+                url=stand_in.url,
+                apikey='badkey') as gateway:
+            await gateway.account
+
+    with pytest.raises(Unauthorized):
+        asyncio.run(run())
+
+
+def test_async_gateway_lists_printjobs_of_a_printer(stand_in):
+    async def run():
+        async with AsyncGateway(
+                url=stand_in.url,
+                apikey='key') as gateway:
+            await gateway.PrintJob(printer=22, uri='a.pdf')
+            by_name = await gateway.printjobs(printer='TEST-PRINTER')
+            by_title = await gateway.printjobs(printjob='PrintJob')
+            return by_name, by_title
+
+    by_name, by_title = asyncio.run(run())
+    assert 1 == len(by_name)
+    assert [by_name[0].id] == [pj.id for pj in by_title]
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'resolution_cache': True},
+    {'transport': object()},
+    {'http_cache': True},
+    {'coalesce_gets': True}])
+def test_async_gateway_rejects_unsupported_arguments(kwargs):
+    with pytest.raises(TypeError) as e:
+        AsyncGateway(apikey='key', **kwargs)
+    assert list(kwargs)[0] in str(e.value)
+
+
+def test_async_classes_only_offer_async_methods():
+    gateway = AsyncGateway(apikey='key')
+    for name in ('iter_printers', 'get_printers_many', 'submit_printjobs'):
+        assert not hasattr(gateway._computers, name)
+    for name in ('get_stream', '__enter__', '__exit__'):
+        assert not hasattr(gateway._auth, name)
@@ -1,6 +1,7 @@
 import pytest
 import time
 
+from printnodeapi.fakeserver import FakeServer
 from printnodeapi.gateway import Gateway, Unauthorized
 from printnodeapi.model import Account
 from credentials import *
@@ -8,17 +9,42 @@ from credentials import *
 API_ADDRESS = API_ADDRESS
 
 
-def test_gateway():
-    time.sleep(1)
-    gateway = Gateway(url=API_ADDRESS, apikey=API_KEY)
-    assert YOUR_NAME == gateway.account.firstname
+@pytest.fixture
+def api():
+    # the live API when credentials.py holds an api key, else a FakeServer
+    if API_KEY:
+        time.sleep(1)
+        yield API_ADDRESS, API_KEY, YOUR_NAME
+    else:
+        with FakeServer(apikeys={'key'}) as server:
+            yield server.url, 'key', server.account['firstname']
 
 
-def test_gateway_handles_unauthentication():
-    time.sleep(1)
+def test_gateway(api):
+    url, apikey, name = api
+    gateway = Gateway(url=url, apikey=apikey)
+    assert name == gateway.account.firstname
+
+
+def test_gateway_handles_unauthentication(api):
+    url, apikey, name = api
     gateway = Gateway(
-        url=API_ADDRESS,
+        url=url,
         email='fake@omlet.co.uk',
         password='helloworld')
     with pytest.raises(Unauthorized):
         gateway.account
+
+
+def test_gateway_shares_connection_pool():
+    gateway = Gateway(
+        url=API_ADDRESS,
+        apikey=API_KEY,
+        pool_connections=2,
+        pool_maxsize=32)
+    adapter = gateway._auth._transport.session.get_adapter(API_ADDRESS)
+    assert 32 == adapter._pool_maxsize
+    assert gateway._computers._auth is gateway._accounts._auth
+    with gateway:
+        pass
+    assert 0 == len(adapter.poolmanager.pools)
@@ -0,0 +1,91 @@
+from printnodeapi.cache import TTLCache
+from printnodeapi.fakeserver import FakeServer
+from printnodeapi.gateway import Gateway
+from standin import stand_in
+
+
+class FakeTimer:
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_entries():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=2, ttl=10, timer=timer)
+    cache.set('a', 1)
+    assert 1 == cache.get('a')
+    timer.now = 10
+    assert cache.get('a') is None
+    assert (1, 1) == (cache.hits, cache.misses)
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=None)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert 1 == cache.get('a')
+    assert cache.get('b') is None
+    cache.invalidate('a')
+    assert cache.get('a') is None
+
+
+def test_resolution_cache_skips_lookups(stand_in):
+    gateway = Gateway(
+        url=stand_in.url,
+        apikey='key',
+        resolution_cache=True)
+    for _ in range(3):
+        gateway._computers.submit_printjob(printer='TEST-PRINTER', uri='a')
+    gateway._computers.submit_printjob(printer=22, uri='a')
+
+    assert 1 == stand_in.requests.count(('GET', '/computers'))
+    assert 1 == stand_in.requests.count(('GET', '/computers/11/printers'))
+    assert 0 == stand_in.requests.count(('GET', '/printers/22'))
+    assert 4 == len(stand_in.posted)
+
+    gateway.invalidate_resolution_cache()
+    gateway._computers.submit_printjob(printer=22, uri='a')
+    assert 1 == stand_in.requests.count(('GET', '/printers/22'))
+
+
+def test_directory_snapshot_warms_a_new_gateway(stand_in, tmpdir):
+    path = str(tmpdir.join('directory'))
+    Gateway(url=stand_in.url, apikey='key').save_directory(path)
+    del stand_in.requests[:]
+
+    gateway = Gateway(
+        url=stand_in.url,
+        apikey='key',
+        resolution_cache=True)
+    snapshot = gateway.load_directory(path, refresh=False)
+    gateway._computers.submit_printjob(printer='TEST-PRINTER', uri='a')
+    gateway._computers.submit_printjob(printer=22, uri='a')
+
+    assert [22] == [p['id'] for p in snapshot.printers]
+    assert [('POST', '/printjobs')] * 2 == stand_in.requests
+
+    refreshed = gateway.load_directory(path).result(timeout=10)
+    assert 1 == stand_in.requests.count(('GET', '/printers?limit=500'))
+    assert snapshot.printers == refreshed.printers
+    assert gateway.load_directory(path, refresh=False, max_age=-1) is None
+
+
+def test_directory_snapshot_larger_than_the_cache(tmpdir):
+    path = str(tmpdir.join('directory'))
+    with FakeServer(seed=0) as server:
+        server.populate(computers=100, printers_per_computer=5)
+        Gateway(url=server.url, apikey='key').save_directory(path)
+        del server.requests[:]
+
+        gateway = Gateway(url=server.url, apikey='key', resolution_cache=True)
+        gateway.load_directory(path, refresh=False)
+        for printer_id in (1, 250, 500):
+            gateway._computers.submit_printjob(printer=printer_id, uri='a')
+
+    assert [('POST', '/printjobs')] * 3 == server.requests
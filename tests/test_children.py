@@ -0,0 +1,34 @@
+import pytest
+
+from printnodeapi import ClientError
+from printnodeapi.children import ChildAccountPool, ChildRecord
+from printnodeapi.fakeserver import FakeServer
+from printnodeapi.transport import InMemoryTransport
+
+
+def make_transport(accounts):
+    # one FakeServer per child account, picked by the child header
+    def app(method, path, headers, body):
+        child = headers.get('X-Child-Account-By-Id')
+        return accounts[int(child)].handle(method, path, headers, body)
+    return InMemoryTransport(app)
+
+
+def test_child_account_pool_fans_out():
+    accounts = {n: FakeServer() for n in (1, 2, 3)}
+    for n, server in accounts.items():
+        server.populate(computers=1, printers_per_computer=n)
+    accounts[3].failures.append(404)
+    transport = make_transport(accounts)
+
+    with ChildAccountPool('parent', [1, 2, 3], transport=transport) as pool:
+        printers = pool.collect(
+            lambda g: g.printers(computer=1),
+            children=[1, 2])
+        with pytest.raises(ClientError) as e:
+            pool.printers()
+
+    assert [1, 2, 2] == [r.child for r in printers]
+    assert all(isinstance(r, ChildRecord) for r in printers)
+    assert 3 == e.value.child
+    assert pool.child(1)._auth._transport is pool.child(2)._auth._transport
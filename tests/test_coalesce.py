@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+from printnodeapi import ServerError
+from printnodeapi.fakeserver import FakeServer
+from printnodeapi.gateway import Gateway
+from printnodeapi.retry import RetryPolicy
+from printnodeapi.transport import InMemoryTransport
+
+
+def call_concurrently(f, threads):
+    barrier = threading.Barrier(threads)
+    results = [None] * threads
+
+    def run(i):
+        barrier.wait()
+        try:
+            results[i] = f()
+        except Exception as e:
+            results[i] = e
+
+    workers = [
+        threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+@pytest.fixture
+def server():
+    server = FakeServer(latency=0.2)
+    server.populate(computers=3, printers_per_computer=1)
+    return server
+
+
+def make_gateway(server, **kwargs):
+    return Gateway(
+        apikey='key',
+        transport=InMemoryTransport(server.handle),
+        **kwargs)
+
+
+def test_concurrent_gets_are_coalesced(server):
+    gateway = make_gateway(server, coalesce_gets=True)
+
+    results = call_concurrently(gateway.computers, 16)
+    gateway.computers()
+
+    requests = server.requests.count(('GET', '/computers'))
+    assert all(3 == len(r) for r in results)
+    assert requests < 16
+    assert 17 == requests + gateway.coalesced_requests
+
+
+def test_coalesced_errors_reach_every_caller(server):
+    gateway = make_gateway(server, coalesce_gets=True)
+    server.failures.extend([500] * 16)
+
+    results = call_concurrently(gateway.computers, 8)
+
+    assert all(isinstance(r, ServerError) for r in results)
+    assert 8 == len(server.requests) + gateway.coalesced_requests
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def interrupt(delay):
+    raise Interrupted()
+
+
+def test_interrupted_get_does_not_block_later_gets(server):
+    gateway = make_gateway(
+        server,
+        coalesce_gets=True,
+        retry_policy=RetryPolicy(sleep=interrupt))
+    server.failures.append(500)
+
+    with pytest.raises(Interrupted):
+        gateway.computers()
+    finished = []
+    worker = threading.Thread(
+        target=lambda: finished.append(gateway.computers()))
+    worker.daemon = True
+    worker.start()
+    worker.join(5)
+
+    assert 1 == len(finished)
+    assert 3 == len(finished[0])
+
+
+def test_gets_are_not_coalesced_by_default(server):
+    gateway = make_gateway(server)
+
+    call_concurrently(gateway.computers, 4)
+
+    assert 4 == len(server.requests)
+    assert 0 == gateway.coalesced_requests
@@ -0,0 +1,95 @@
+import pytest
+
+from printnodeapi.computers import _id_chunks
+from printnodeapi.fakeserver import FakeServer
+from printnodeapi.gateway import Gateway
+from printnodeapi.transport import InMemoryTransport
+from standin import PRINTJOB, stand_in
+
+
+def test_submit_printjobs_pipelines_jobs(stand_in):
+    gateway = Gateway(url=stand_in.url, apikey='key')
+    jobs = [
+        {'printer': 22, 'title': str(i), 'uri': 'a.pdf'}
+        for i in range(40)]
+    jobs[7] = {'printer': 99, 'uri': 'a.pdf'}
+
+    results = list(gateway.submit_printjobs(jobs, max_workers=4))
+
+    assert list(range(40)) == [r.index for r in results]
+    assert isinstance(results[7].error, LookupError)
+    assert 39 == len(set(r.printjob_id for r in results if r.error is None))
+    assert 1 == stand_in.requests.count(('GET', '/printers/22'))
+
+
+def test_submit_printjobs_unordered(stand_in):
+    gateway = Gateway(url=stand_in.url, apikey='key')
+    jobs = [{'printer': 22, 'uri': 'a.pdf'} for _ in range(10)]
+
+    results = gateway.submit_printjobs(jobs, max_workers=4, ordered=False)
+
+    assert list(range(10)) == sorted(r.index for r in results)
+
+
+@pytest.mark.parametrize('prefetch', [False, True])
+def test_iter_printjobs_follows_cursor(stand_in, prefetch):
+    for _ in range(25):
+        stand_in.add_printjob(22)
+    gateway = Gateway(url=stand_in.url, apikey='key')
+
+    printjobs = gateway.iter_printjobs(page_size=10, prefetch=prefetch)
+
+    assert list(range(25, 0, -1)) == [pj.id for pj in printjobs]
+    assert [
+        '/printjobs?limit=10',
+        '/printjobs?limit=10&after=16',
+        '/printjobs?limit=10&after=6'] == [
+        path for method, path in stand_in.requests]
+
+
+def test_lazy_printjob_posts_once(stand_in):
+    gateway = Gateway(url=stand_in.url, apikey='key')
+
+    handle = gateway.PrintJob(printer=22, title='label', uri='a.pdf', lazy=True)
+
+    assert [('POST', '/printjobs')] == stand_in.requests
+    assert (22, 'label', 'pdf_uri', 1) == (
+        handle.printer_id, handle.title, handle.content_type, handle.qty)
+    assert not handle.loaded
+
+
+def test_lazy_printjobs_refresh_in_one_batch(stand_in):
+    gateway = Gateway(url=stand_in.url, apikey='key')
+    handles = [
+        gateway.PrintJob(printer=22, uri='a.pdf', lazy=True)
+        for _ in range(3)]
+    del stand_in.printjobs[handles[2].id]
+    del stand_in.requests[:]
+
+    assert PRINTJOB['state'] == handles[0].state
+    assert handles[1].loaded
+    ids = ','.join(str(h.id) for h in handles)
+    assert [('GET', '/printjobs/' + ids)] == stand_in.requests
+    with pytest.raises(LookupError):
+        handles[2].printjob
+
+
+def test_get_many_fetches_ids_in_chunks():
+    server = FakeServer()
+    server.populate(computers=1, printers_per_computer=1, printjobs=250)
+    gateway = Gateway(apikey='key', transport=InMemoryTransport(server.handle))
+    ids = sorted(server.printjobs) + [999999, 1]
+
+    printjobs = gateway.printjobs_many(ids)
+    printers = gateway.printers_many([1])
+
+    assert sorted(server.printjobs) == sorted(printjobs)
+    assert all(pj.id == i for i, pj in printjobs.items())
+    assert 3 == len([r for r in server.requests if r[1] != '/printers/1'])
+    assert [1] == list(printers)
+    assert {} == gateway.computers_many([])
+
+
+def test_id_chunks_respect_both_limits():
+    assert ['1,2', '3,2000', '30000'] == _id_chunks(
+        [1, 2, 2, 3, 2000, 30000], batch_size=2, max_length=6)
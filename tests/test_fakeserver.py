@@ -0,0 +1,51 @@
+from printnodeapi.fakeserver import FakeServer
+from printnodeapi.gateway import Gateway
+from printnodeapi.retry import RetryPolicy
+
+
+def test_fake_server_serves_synthetic_dataset():
+    with FakeServer(default_limit=100, seed=1) as server:
+        server.populate(
+            computers=30,
+            printers_per_computer=10,
+            printjobs=50,
+            states_per_printjob=3)
+        gateway = Gateway(url=server.url, apikey='any')
+
+        assert 300 == len(list(gateway.iter_printers(page_size=64)))
+        assert 100 == len(gateway.printers())
+        assert 10 == len(gateway.printers(computer=5))
+        states = gateway.states('1,2')
+        assert [['new', 'sent_to_client', 'queued']] * 2 == [
+            [s.state for s in job] for job in states]
+
+
+def test_fake_server_injects_failures_and_latency():
+    with FakeServer(
+            latency=0.001,
+            failure_rate=0.3,
+            failure_statuses=(500, 503),
+            seed=2) as server:
+        server.populate()
+        gateway = Gateway(
+            url=server.url,
+            apikey='any',
+            retry_policy=RetryPolicy(max_attempts=10, sleep=lambda s: None))
+
+        for _ in range(20):
+            assert 'Mr' == gateway.account.firstname
+        assert len(server.requests) > 20
+
+
+def test_fake_server_accounts():
+    with FakeServer() as server:
+        gateway = Gateway(url=server.url, apikey='any')
+
+        gateway.ModifyTag('site', 'north')
+        assert 'north' == gateway.tag('site')
+        assert gateway.DeleteTag('site')
+
+        server.add_client(os='windows', version='4.7.1')
+        server.add_client(os='windows', version='4.7.2')
+        assert [1, 2] == gateway.ModifyClientDownloads('1,2', False)
+        assert [False, False] == [c.enabled for c in gateway.clients()]
@@ -0,0 +1,86 @@
+from printnodeapi.fakeserver import FakeServer
+from printnodeapi.gateway import Gateway
+from printnodeapi.httpcache import HttpCache
+from printnodeapi.transport import InMemoryTransport
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_gateway(server, cache):
+    return Gateway(
+        apikey='key',
+        transport=InMemoryTransport(server.handle),
+        http_cache=cache)
+
+
+def test_http_cache_revalidates():
+    server = FakeServer()
+    server.populate(computers=3, printers_per_computer=1)
+    cache = HttpCache()
+    gateway = make_gateway(server, cache)
+
+    first = gateway.computers()
+    second = gateway.computers()
+    server.add_computer()
+    third = gateway.computers()
+
+    assert 3 == len(first) == len(second)
+    assert first[0] is second[0]
+    assert 4 == len(third)
+    assert (0, 1, 2) == (cache.hits, cache.revalidated, cache.misses)
+    assert 3 == len(server.requests)
+
+
+def test_http_cache_ttl_skips_requests():
+    server = FakeServer()
+    server.populate(computers=2, printers_per_computer=1)
+    clock = Clock()
+    cache = HttpCache(ttls={'/computers': 60}, timer=clock)
+    gateway = make_gateway(server, cache)
+
+    gateway.computers()
+    gateway.computers()
+    clock.now += 61
+    gateway.computers()
+
+    assert 2 == len(server.requests)
+    assert (1, 1) == (cache.hits, cache.revalidated)
+
+
+def test_http_cache_is_per_account():
+    server = FakeServer()
+    server.populate(computers=1, printers_per_computer=1)
+    cache = HttpCache(ttl=60)
+    transport = InMemoryTransport(server.handle)
+    parent = Gateway(apikey='key', transport=transport, http_cache=cache)
+    child = Gateway(
+        apikey='key',
+        child_id='5',
+        transport=transport,
+        http_cache=cache)
+
+    parent.computers()
+    child.computers()
+
+    assert 2 == len(server.requests)
+    assert 2 == len(cache)
+
+
+def test_http_cache_on_disk(tmpdir):
+    server = FakeServer()
+    server.populate(computers=2, printers_per_computer=1)
+    directory = str(tmpdir.join('cache'))
+
+    before = make_gateway(server, HttpCache(directory=directory)).computers()
+    cache = HttpCache(directory=directory)
+    after = make_gateway(server, cache).computers()
+
+    assert before == after
+    assert 1 == cache.revalidated
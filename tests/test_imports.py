@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_after(statement):
+    # the modules statement imports, in a fresh interpreter
+    code = (
+        'import sys\n'
+        'before = set(sys.modules)\n'
+        '{}\n'
+        'print(" ".join(sorted(set(sys.modules) - before)))').format(statement)
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.check_output([sys.executable, '-c', code], env=env)
+    return set(output.decode('ascii').split())
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 7),
+    reason='needs module __getattr__')
+def test_package_import_is_slim():
+    modules = imported_after('import printnodeapi')
+    assert 'printnodeapi.gateway' not in modules
+    assert 'requests' not in modules
+
+    modules = imported_after('from printnodeapi import Gateway')
+    assert 'printnodeapi.gateway' in modules
+    assert not {'requests', 'future', 'asyncio'} & modules
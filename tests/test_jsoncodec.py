@@ -0,0 +1,39 @@
+import pytest
+
+from printnodeapi.fakeserver import FakeServer
+from printnodeapi.gateway import Gateway
+from printnodeapi.jsoncodec import JsonCodec, OrjsonCodec
+from printnodeapi.transport import InMemoryTransport
+
+
+def codecs():
+    yield JsonCodec()
+    try:
+        yield OrjsonCodec()
+    except ImportError:
+        pass
+
+
+@pytest.mark.parametrize('codec', list(codecs()), ids=lambda c: c.name)
+def test_codec_round_trip(codec):
+    obj = {'title': u'étiquette', 'options': {'copies': 2}, 'n': None}
+    data = codec.dumps(obj)
+    assert isinstance(data, bytes)
+    assert obj == codec.loads(data)
+    assert obj == JsonCodec().loads(data)
+    # beyond the 64-bit integers orjson encodes, json takes over
+    assert 2 ** 70 + 1 == JsonCodec().loads(codec.dumps(2 ** 70 + 1))
+
+
+@pytest.mark.parametrize('codec', list(codecs()), ids=lambda c: c.name)
+def test_gateway_uses_codec(codec):
+    server = FakeServer()
+    server.populate(computers=1, printers_per_computer=1)
+    gateway = Gateway(
+        apikey='key',
+        transport=InMemoryTransport(server.handle),
+        json_codec=codec)
+
+    printjob_id = gateway.PrintJob(printer=1, uri='a.pdf', title=u'é')
+
+    assert u'é' == gateway.printjobs(printjob=printjob_id).title
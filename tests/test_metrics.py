@@ -0,0 +1,65 @@
+import pytest
+
+from printnodeapi import ClientError
+from printnodeapi.gateway import Gateway
+from printnodeapi.metrics import (
+    MetricsAggregator,
+    RequestEvent,
+    endpoint_template)
+from standin import stand_in
+
+
+def test_endpoint_template():
+    assert '/computers/{id}/printers' == endpoint_template(
+        'http://localhost:1/computers/1,2/printers?limit=5')
+    assert '/printjobs/{id}' == endpoint_template('/printjobs/33')
+    assert '/whoami' == endpoint_template('/whoami')
+
+
+def test_observers_see_every_request(stand_in):
+    events = []
+    gateway = Gateway(
+        url=stand_in.url,
+        apikey='key',
+        observers=[events.append])
+
+    gateway.printers(printer=22)
+    stand_in.failures.append(404)
+    with pytest.raises(ClientError):
+        gateway.printers(printer=99)
+
+    ok, failed = events
+    assert ('GET', '/printers/{id}', 200, None) == (
+        ok.method, ok.endpoint, ok.status_code, ok.exception)
+    assert ok.response_bytes > 0 and ok.ttfb >= 0 and ok.download >= 0
+    assert (404, ClientError) == (failed.status_code, failed.exception)
+
+
+def test_failing_observer_does_not_fail_the_request(stand_in, caplog):
+    def broken(event):
+        raise RuntimeError('metrics backend down')
+
+    gateway = Gateway(url=stand_in.url, apikey='key', observers=[broken])
+
+    printjob_id = gateway._computers.submit_printjob(printer=22, uri='a')
+
+    assert printjob_id in stand_in.printjobs
+    assert 'metrics backend down' in caplog.text
+
+
+def test_metrics_aggregator():
+    metrics = MetricsAggregator(buckets=(0.1, 1))
+    for elapsed in (0.05, 0.2, 0.3, 2):
+        metrics(RequestEvent(
+            'GET', '/whoami', None, 200, None, None, None, elapsed,
+            0, 10, 1, None))
+
+    report = metrics.snapshot()['GET /whoami']
+
+    assert (4, 0, 4, 40) == (
+        report['count'], report['errors'], report['retries'],
+        report['response_bytes'])
+    assert [(0.1, 1), (1, 3), (float('inf'), 4)] == (
+        report['latency']['buckets'])
+    assert 0.3 == report['latency']['p50']
+    assert 2 == metrics.percentile('GET /whoami', 100)
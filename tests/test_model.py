@@ -0,0 +1,46 @@
+from printnodeapi.model import Computer, ModelDecoder, ModelFactory
+from standin import PRINTER, PRINTJOB
+
+
+def printjobs(count, printers):
+    return [
+        dict(PRINTJOB, id=n, printer=dict(PRINTER, id=n % printers))
+        for n in range(count)]
+
+
+def test_factory_interns_nested_models_within_a_response():
+    factory = ModelFactory()
+    jobs = factory.create_printjobs(printjobs(1000, 5))
+    assert 5 == len(set(id(pj.printer) for pj in jobs))
+    assert 1 == len(set(id(pj.printer.computer) for pj in jobs))
+    assert jobs[0].printer is not factory.create_printjobs(
+        printjobs(1, 5))[0].printer
+
+
+def test_factory_only_interns_identical_content():
+    factory = ModelFactory()
+    raw = printjobs(2, 1)
+    raw[1]['printer'] = dict(raw[1]['printer'], state='offline')
+    first, second = factory.create_printjobs(raw)
+    assert first.printer is not second.printer
+    assert 'offline' == second.printer.state
+
+
+def test_factory_interns_across_responses():
+    factory = ModelFactory(intern_across_responses=True)
+    first = factory.create_printjobs(printjobs(1, 5))[0]
+    second = factory.create_printjob(printjobs(1, 5)[0])
+    assert first.printer is second.printer
+
+
+def test_model_decoder_maps_keys_and_defaults():
+    decoder = ModelDecoder(
+        Computer,
+        defaults={'state': 'unknown', 'hostname': list},
+        renames={'inet_6': 'inet6'})
+    first = decoder({'id': 1, 'inet6': '::1', 'jre': None})
+    second = decoder({'id': 2, 'createTimestamp': 'now'})
+    assert (1, '::1', 'unknown') == (first.id, first.inet6, first.state)
+    assert 'now' == second.create_timestamp
+    assert [] == first.hostname
+    assert first.hostname is not second.hostname
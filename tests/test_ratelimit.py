@@ -0,0 +1,62 @@
+import pytest
+
+from printnodeapi import TooManyRequests
+from printnodeapi.gateway import Gateway
+from printnodeapi.ratelimit import RateLimiter, parse_retry_after
+from standin import stand_in
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_rate_limiter_allows_burst_then_paces():
+    clock = FakeClock()
+    limiter = RateLimiter(10, burst=5, timer=clock, sleep=clock.sleep)
+    for _ in range(5):
+        limiter.acquire()
+    assert 0 == clock.now
+    limiter.acquire()
+    assert 0.1 == pytest.approx(clock.now)
+
+
+def test_rate_limiter_backs_off_and_recovers():
+    clock = FakeClock()
+    limiter = RateLimiter(10, burst=1, timer=clock, sleep=clock.sleep)
+    limiter.throttled(retry_after=2)
+    assert 5 == limiter.current_rate
+    limiter.acquire()
+    assert 2 == pytest.approx(clock.now)
+    for _ in range(10):
+        limiter.succeeded()
+    assert 10 == limiter.current_rate
+
+
+def test_parse_retry_after():
+    assert 3 == parse_retry_after('3')
+    assert 0 == parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT')
+    assert parse_retry_after(None) is None
+
+
+def test_auth_retries_throttled_requests(stand_in):
+    limiter = RateLimiter(100, max_retries=2)
+    gateway = Gateway(
+        url=stand_in.url,
+        apikey='key',
+        rate_limiter=limiter)
+    stand_in.failures.extend([429, 429])
+    assert 'Mr' == gateway.account.firstname
+    assert 3 == len(stand_in.requests)
+
+    stand_in.failures.extend([429, 429, 429])
+    with pytest.raises(TooManyRequests) as e:
+        gateway.account
+    assert 0 == e.value.retry_after
@@ -0,0 +1,58 @@
+import pytest
+
+from printnodeapi import ClientError, ServerError
+from printnodeapi.gateway import Gateway
+from printnodeapi.retry import RetryPolicy
+from standin import stand_in
+
+
+def test_retry_policy_rules():
+    policy = RetryPolicy(max_attempts=4, rules={ServerError: 2})
+    error = ServerError(500, 'ServerError', 'boom')
+    assert policy.should_retry(error, 1)
+    assert not policy.should_retry(error, 2)
+    assert not policy.should_retry(ClientError(400, 'Bad', 'bad'), 1)
+    assert policy.allows('GET', None)
+    assert not policy.allows('POST', {})
+    assert policy.allows('POST', {'X-Idempotency-Key': 'abc'})
+
+
+def test_retry_policy_backs_off_exponentially():
+    policy = RetryPolicy(backoff=1, max_backoff=5, jitter=False)
+    assert [1, 2, 4, 5] == [policy.delay(n) for n in range(1, 5)]
+    jittered = RetryPolicy(backoff=1, max_backoff=5)
+    assert 0 <= jittered.delay(3) <= 4
+
+
+def test_auth_retries_idempotent_requests(stand_in):
+    gateway = Gateway(
+        url=stand_in.url,
+        apikey='key',
+        retry_policy=RetryPolicy(sleep=lambda s: None))
+    stand_in.failures.extend([500, 503])
+    assert 'Mr' == gateway.account.firstname
+    assert 2 == gateway.last_retries
+
+    stand_in.failures.extend([500, 500, 500])
+    with pytest.raises(ServerError) as e:
+        gateway.account
+    assert 2 == e.value.retries
+
+
+def test_auth_retries_submissions_only_with_idempotency_key(stand_in):
+    gateway = Gateway(
+        url=stand_in.url,
+        apikey='key',
+        retry_policy=RetryPolicy(sleep=lambda s: None))
+    stand_in.failures.extend([500])
+    with pytest.raises(ServerError):
+        gateway._computers._post_printjob(22, uri='a.pdf')
+
+    stand_in.failures.extend([500])
+    gateway._computers._post_printjob(
+        22,
+        uri='a.pdf',
+        idempotency_key='label-1')
+    assert 3 == stand_in.requests.count(('POST', '/printjobs'))
+    assert 1 == len(stand_in.posted)
+    assert 1 == gateway.last_retries
@@ -0,0 +1,60 @@
+import json
+import tracemalloc
+
+import pytest
+
+from printnodeapi.fakeserver import FakeServer
+from printnodeapi.gateway import Gateway
+from printnodeapi.model import PrintJob
+from printnodeapi.stream import iter_json_array
+from printnodeapi.transport import InMemoryTransport
+from standin import stand_in
+
+
+def chunked(data, size):
+    return [data[i:i+size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 5, 64])
+def test_iter_json_array_across_chunk_boundaries(size):
+    records = [{'title': u'été', 'qty': [1, 2]}, 12345, True, None]
+    data = json.dumps(records).encode('utf-8')
+    assert records == list(iter_json_array(chunked(data, size)))
+
+
+def test_iter_json_array_rejects_bad_input():
+    assert [] == list(iter_json_array([b' [ ] ']))
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"a": 1}']))
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'[1, 2']))
+
+
+def test_iter_printjobs_streams_responses(stand_in):
+    for _ in range(500):
+        stand_in.add_printjob(22)
+    gateway = Gateway(url=stand_in.url, apikey='key')
+
+    printjobs = gateway.iter_printjobs(page_size=None, stream=True)
+
+    ids = [pj.id for pj in printjobs if isinstance(pj, PrintJob)]
+    assert list(range(500, 0, -1)) == ids
+    assert [('GET', '/printjobs')] == stand_in.requests
+
+
+def test_iter_printers_memory_stays_flat_across_pages():
+    server = FakeServer(seed=0)
+    server.populate(computers=100, printers_per_computer=60)
+    gateway = Gateway(apikey='key', transport=InMemoryTransport(server.handle))
+
+    used = {}
+    tracemalloc.start()
+    try:
+        for n, _ in enumerate(gateway.iter_printers(page_size=500), 1):
+            if n in (1000, 5500):
+                used[n] = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    # keeping every printer would take several MB more by the end
+    assert used[5500] - used[1000] < 1024 * 1024
@@ -0,0 +1,60 @@
+import threading
+
+from printnodeapi.fakeserver import FakeServer
+from printnodeapi.gateway import Gateway
+from printnodeapi.transport import InMemoryTransport
+
+THREADS = 200
+
+
+def test_gateway_shared_by_many_threads():
+    server = FakeServer()
+    server.populate(computers=2, printers_per_computer=2)
+    client_id = server.add_client()['id']
+    seen = []
+
+    def app(method, path, headers, body):
+        seen.append((method, dict(headers)))
+        return server.handle(method, path, headers, body)
+
+    gateway = Gateway(
+        apikey='key',
+        child_id='7',
+        transport=InMemoryTransport(app),
+        resolution_cache=True)
+    barrier = threading.Barrier(THREADS)
+    errors = []
+
+    def work(n):
+        barrier.wait()
+        try:
+            for i in range(5):
+                if n % 3 == 0:
+                    gateway.ModifyClientDownloads(client_id, i % 2 == 0)
+                elif n % 3 == 1:
+                    gateway.PrintJob(
+                        printer=1,
+                        uri='a.pdf',
+                        idempotency_key='{}-{}'.format(n, i))
+                else:
+                    assert 4 == len(gateway.printers())
+        except Exception as e:
+            errors.append(e)
+
+    workers = [
+        threading.Thread(target=work, args=(n,)) for n in range(THREADS)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert [] == errors
+    assert {'X-Child-Account-By-Id': '7'} == gateway._auth._headers
+    posted = set()
+    for method, headers in seen:
+        assert '7' == headers['X-Child-Account-By-Id']
+        assert (method == 'PATCH') == ('Content-Type' in headers)
+        assert (method == 'POST') == ('X-Idempotency-Key' in headers)
+        if method == 'POST':
+            posted.add(headers['X-Idempotency-Key'])
+    assert len(server.posted) == len(posted)
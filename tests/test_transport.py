@@ -0,0 +1,93 @@
+import io
+import socket
+
+import pytest
+
+from printnodeapi import ClientError, ConnectionError
+from printnodeapi.fakeserver import FakeServer
+from printnodeapi.gateway import Gateway
+from printnodeapi.transport import (
+    HttpxTransport,
+    InMemoryTransport,
+    RequestsTransport,
+    Urllib3Transport)
+from standin import stand_in
+
+TRANSPORTS = {
+    'requests': RequestsTransport,
+    'urllib3': Urllib3Transport,
+    'httpx': lambda: HttpxTransport(http2=True)}
+
+
+@pytest.mark.parametrize('name', sorted(TRANSPORTS))
+def test_transports_talk_to_the_api(stand_in, name):
+    if name == 'httpx':
+        pytest.importorskip('httpx')
+        pytest.importorskip('h2')
+    with Gateway(
+            url=stand_in.url,
+            apikey='key',
+            transport=TRANSPORTS[name]()) as gateway:
+        assert 'Mr' == gateway.account.firstname
+        assert [22] == [p.id for p in gateway.printers(printer='TEST-PRINTER')]
+        gateway._computers.submit_printjob(
+            printer=22,
+            file=io.BytesIO(b'%PDF-1.4'))
+        gateway._computers.submit_printjob(
+            printer=22,
+            file=_Unseekable(b'%PDF-1.4'))
+        assert 2 == len(list(gateway.iter_printjobs(stream=True)))
+        with pytest.raises(ClientError):
+            gateway.tag('missing')
+
+
+@pytest.mark.parametrize('name', sorted(TRANSPORTS))
+def test_transport_errors_are_mapped(name):
+    if name == 'httpx':
+        pytest.importorskip('httpx')
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    port = listener.getsockname()[1]
+    listener.close()
+    gateway = Gateway(
+        url='http://127.0.0.1:{}'.format(port),
+        apikey='key',
+        transport=TRANSPORTS[name]())
+    with pytest.raises(ConnectionError):
+        gateway.account
+
+
+def test_in_memory_transport():
+    server = FakeServer()
+    server.populate(computers=2, printers_per_computer=3)
+    gateway = Gateway(
+        url='http://fake',
+        apikey='key',
+        transport=InMemoryTransport(server.handle))
+
+    assert 6 == len(gateway.printers())
+    assert 3 == len(gateway.printers(computer=1))
+    assert ('GET', '/computers/1/printers') == server.requests[-1]
+
+
+def test_requests_transport_ignores_netrc(stand_in, tmpdir, monkeypatch):
+    host = stand_in.url.split('://', 1)[1].split(':', 1)[0]
+    netrc = tmpdir.join('netrc')
+    netrc.write('machine {} login other-key password x\n'.format(host))
+    monkeypatch.setenv('NETRC', str(netrc))
+
+    gateway = Gateway(url=stand_in.url, apikey='key')
+
+    assert 'Mr' == gateway.account.firstname
+
+class _Unseekable(io.RawIOBase):
+    # a file object without a known length, sent chunked
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        return self._data.readinto(b)
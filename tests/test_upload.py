@@ -0,0 +1,83 @@
+import base64
+import io
+import json
+
+import pytest
+
+from printnodeapi import ServerError
+from printnodeapi.gateway import Gateway
+from printnodeapi.retry import RetryPolicy
+from printnodeapi.upload import Base64File, JsonBody
+from standin import stand_in
+
+DOCUMENT = bytes(bytearray(range(256))) * 41
+
+
+@pytest.mark.parametrize('size', [0, 1, 2, 3, 100])
+def test_json_body_streams_base64_content(size):
+    fields = {'title': u'\xe9t\xe9', 'content': Base64File(
+        io.BytesIO(DOCUMENT[:size]),
+        chunk_size=9)}
+    body = JsonBody(fields)
+    data = b''.join(body)
+    assert len(data) == body.len
+    assert all(len(chunk) <= 12 for chunk in list(body)[1:-1])
+    decoded = json.loads(data.decode('utf-8'))
+    assert DOCUMENT[:size] == base64.b64decode(decoded['content'])
+    assert data == b''.join(body)
+
+
+def test_submit_printjob_from_path(stand_in, tmpdir):
+    document = tmpdir.join('label.pdf')
+    document.write_binary(DOCUMENT)
+    gateway = Gateway(url=stand_in.url, apikey='key')
+
+    gateway._computers._post_printjob(22, path=str(document))
+
+    posted = stand_in.posted[0]
+    assert DOCUMENT == base64.b64decode(posted['content'])
+    assert 'pdf_base64' == posted['contentType']
+    assert 22 == posted['printerId']
+
+
+
+def test_submit_printjob_from_pathlib_path(stand_in, tmp_path):
+    document = tmp_path / 'label.pdf'
+    document.write_bytes(DOCUMENT)
+    gateway = Gateway(url=stand_in.url, apikey='key')
+
+    gateway._computers.submit_printjob(printer=22, path=document)
+
+    assert DOCUMENT == base64.b64decode(stand_in.posted[0]['content'])
+    assert Base64File(document).replayable
+
+class Pipe(io.BytesIO):
+    # a file object that can only be read forward, like a pipe or socket
+
+    def seekable(self):
+        return False
+
+
+def test_non_seekable_upload_is_not_retried(stand_in):
+    gateway = Gateway(
+        url=stand_in.url,
+        apikey='key',
+        retry_policy=RetryPolicy(sleep=lambda s: None))
+    stand_in.failures.append(503)
+
+    with pytest.raises(ServerError):
+        gateway._computers._post_printjob(
+            22,
+            file=Pipe(DOCUMENT),
+            idempotency_key='label-1')
+
+    assert 1 == stand_in.requests.count(('POST', '/printjobs'))
+    assert [] == stand_in.posted
+
+
+def test_non_seekable_file_is_read_once():
+    encoded = Base64File(Pipe(DOCUMENT))
+    assert not encoded.replayable
+    assert DOCUMENT == base64.b64decode(b''.join(encoded))
+    with pytest.raises(ValueError):
+        list(encoded)
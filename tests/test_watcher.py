@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import TimeoutError
+
+import pytest
+
+from printnodeapi.gateway import Gateway
+from printnodeapi.watcher import JobWatcher
+from standin import stand_in
+
+
+def test_job_watcher_polls_in_batches(stand_in):
+    gateway = Gateway(url=stand_in.url, apikey='key')
+    watcher = JobWatcher(gateway, batch_size=2, background=False)
+    for n in (1, 2, 3):
+        stand_in.add_state(n, 'new')
+    futures = [watcher.watch(n) for n in (1, 2, 3)]
+
+    assert 3 == watcher.poll()
+    assert 0 == watcher.poll()
+    stand_in.add_state(2, 'done')
+    assert 1 == watcher.poll()
+
+    assert 'done' == futures[1].result(0).state
+    assert not futures[0].done()
+    assert 2 == watcher.pending
+    assert 6 == len(stand_in.requests)
+    assert ('GET', '/printjobs/1,2/states') == stand_in.requests[0]
+
+
+def test_job_watcher_resolves_in_background(stand_in):
+    gateway = Gateway(url=stand_in.url, apikey='key')
+    stand_in.add_state(7, 'new')
+    stand_in.add_state(7, 'error')
+    seen = []
+    with JobWatcher(gateway, min_interval=0.01) as watcher:
+        future = watcher.watch(7, callback=seen.append)
+        assert 'error' == future.result(5).state
+    assert [future.result()] == seen
+
+
+def test_job_watcher_close_cancels_pending_jobs(stand_in):
+    gateway = Gateway(url=stand_in.url, apikey='key')
+    stand_in.add_state(1, 'new')
+    watcher = JobWatcher(gateway, background=False)
+    future = watcher.watch(1)
+    watcher.poll()
+
+    watcher.close()
+
+    assert future.cancelled()
+    assert 0 == watcher.pending
+    with pytest.raises(RuntimeError):
+        watcher.watch(2)
+
+
+def test_job_watcher_gives_up_after_timeout(stand_in):
+    gateway = Gateway(url=stand_in.url, apikey='key')
+    watcher = JobWatcher(gateway, background=False, timeout=0.05)
+    future = watcher.watch(9)  # never returns any state
+    watcher.poll()
+    assert not future.done()
+
+    time.sleep(0.1)
+    watcher.poll()
+
+    with pytest.raises(TimeoutError):
+        future.result(0)
+    assert 0 == watcher.pending